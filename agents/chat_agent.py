@@ -1,5 +1,7 @@
 from pydantic import BaseModel , Field
-from typing import Literal , Optional
+from typing import Literal , Optional , List , Dict
+from string import Template
+import re
 from langchain.agents import create_agent
 from langgraph.types import Command
 from langchain_core.runnables import RunnableConfig
@@ -11,6 +13,62 @@ from config.logger import setup_logger
 # Configure logging
 logger = setup_logger(__name__)
 
+# Conversation history gets a fixed prompt budget instead of a fixed message count
+MAX_HISTORY_TOKENS = 2000
+CHARS_PER_TOKEN = 4  # rough estimate; the served model's tokenizer isn't available locally
+# Each message is capped first, so one long reply can't push every earlier turn out
+MAX_HISTORY_MESSAGE_CHARS = 800
+# Agent messages this long are the generated tutorial, whose preview the prompt already has
+TUTORIAL_MESSAGE_CHARS = 3000
+
+# Static part of the failure update, built once instead of in every except block
+_FAILURE_UPDATE = {
+    "qa_response": "I'm having trouble understanding. Could you rephrase your request",
+    "current_agent": "chat_agent"
+}
+
+# Whole-message match only, so anything more nuanced still goes to the LLM
+_TUTORIAL_REQUEST_RE = re.compile(
+    r"^\s*(?:please\s+)?(?:create|generate|make|build|write)\s+(?:me\s+)?(?:(?:a|an)\s+)?"
+    r"(?P<lib>[a-z0-9][\w.\-]*)\s+tutorial\s*[.!]?\s*$",
+    re.IGNORECASE,
+)
+# Words that can sit where the library name goes ("write a beginner tutorial", "make this
+# tutorial", "create a python tutorial"); these go to the LLM, which can ask or use the history
+_NOT_LIBRARY_NAMES = frozenset({
+    # articles, pronouns, demonstratives
+    "a", "an", "the", "me", "my", "our", "your", "it", "this", "that", "these", "those", "same",
+    # adjectives
+    "new", "another", "other", "different", "second", "simple", "basic", "quick", "short", "long",
+    "full", "complete", "detailed", "comprehensive", "thorough", "brief", "small", "mini", "good",
+    "better", "great", "proper", "real", "beginner", "beginners", "beginner-friendly", "intro",
+    "introductory", "starter", "intermediate", "advanced", "step-by-step", "in-depth", "hands-on",
+    "practical", "easy", "full-length", "fun", "cool", "nice", "awesome", "useful", "interesting",
+    "modern", "minimal", "complete-beginner", "crash", "crash-course", "overview", "general",
+    "whole", "entire", "tiny", "big", "large", "extensive", "updated", "latest", "first", "next",
+    "any", "some", "one", "single", "sample", "example", "demo", "test", "random", "coding",
+    "programming", "code", "library", "framework", "package", "module", "web", "api", "full-stack",
+    # languages and runtimes rather than libraries
+    "python", "py", "python3", "javascript", "js", "typescript", "ts", "node", "nodejs", "node.js",
+    "deno", "bun", "go", "golang", "rust", "java", "kotlin", "scala", "swift", "c", "cpp", "c++",
+    "csharp", "c#", "dotnet", ".net", "ruby", "php", "perl", "lua", "r", "julia", "dart", "elixir",
+    "haskell", "html", "css", "sql", "bash", "shell",
+})
+
+# Parsed once at import; each turn only fills in the values
+_CHAT_CONTEXT_TEMPLATE = Template("""
+    User Message: "$user_message"
+
+    Current State:
+    - Tutorial Generated: $tutorial_exists
+    - Library: $library
+    - Index Available: $index_available
+    Generated Tutorial Preview:
+    $tutorial_preview
+    $history
+    Process the user's message and respond appropriately. Use the conversation history to understand context from previous messages.
+    """)
+
 class ChatResponse(BaseModel):
     action:Literal["generate_tutorial","answer_question","clarify"] = Field(description="What action to take: start tutorial generation, answer question directly, or ask for clarification")
     lib_name:Optional[str] = Field(description= "Name of the library in lowercase to avoid case sensitivity issues , if task is to generate tutorial")
@@ -57,97 +115,171 @@ Keep responses friendly and technical. Use code blocks for examples.
 Your task is to help users to learn new libraries. Don't answer questions that not related to the tutorial or library learning (IMPORTANT!!!)"""
 )
 
-async def chat_agent_node(state:AgentState, config: RunnableConfig):
-    logger.info(f"Chat agent processing query: {state['user_query']}")
+def _match_tutorial_request(message: str) -> Optional[ChatResponse]:
+    """Classify plain "create X tutorial" messages without an LLM round-trip."""
+    match = _TUTORIAL_REQUEST_RE.match(message)
+    # Package names contain a letter ("create a 101 tutorial" names no library)
+    if not match or match["lib"].lower() in _NOT_LIBRARY_NAMES or not re.search(r"[a-z]", match["lib"], re.IGNORECASE):
+        return None
+    lib_name = match["lib"].lower()
+    # trusted: every field is set here, nothing to validate
+    return ChatResponse.model_construct(
+        action="generate_tutorial",
+        lib_name=lib_name,
+        target_language=None,
+        response_message=f"I'll generate a tutorial for {lib_name}...",
+        additional_code=None,
+    )
+
 
-    user_message = state["user_query"]
-    tutorial_exists = bool(state["final_markdown"])
+def _format_history(chat_history: List[Dict[str, str]]) -> str:
+    """Render the newest messages that fit in MAX_HISTORY_TOKENS, oldest first."""
+    budget = MAX_HISTORY_TOKENS * CHARS_PER_TOKEN
+    lines = []
+    for msg in reversed(chat_history):
+        if budget <= 0:
+            break
+        role = "User" if msg["role"] == "user" else "Agent"
+        content = msg["content"]
+        if role == "Agent" and len(content) >= TUTORIAL_MESSAGE_CHARS:
+            content = "[generated tutorial, see the preview above]"
+        content = content[:min(MAX_HISTORY_MESSAGE_CHARS, budget)]
+        budget -= len(content)
+        lines.append(f"    - {role}: {content}\n")
+    if not lines:
+        return ""
+    return "\n    Conversation History (last messages):\n" + "".join(reversed(lines))
+
+
+def _build_chat_context(state: AgentState) -> str:
+    """Build the chat agent prompt from the current session state."""
     tutorial_content = state["final_markdown"]
-    index_id = state["doc_index_id"]
-    library_name = state["lib_name"]
-    chat_history = state.get("chat_history", [])
-
-    # Format conversation history for context
-    history_text = ""
-    if chat_history:
-        history_text = "\n    Conversation History (last messages):\n"
-        for msg in chat_history[-10:]:
-            role = "User" if msg["role"] == "user" else "Agent"
-            content = msg["content"][:300]  # Truncate long messages
-            history_text += f"    - {role}: {content}\n"
-
-    context = f"""
-    User Message: "{user_message}"
+    tutorial_exists = bool(tutorial_content)
+    # critique_agent stores the preview with the tutorial; slice only for older sessions without it
+    tutorial_preview = state.get("final_markdown_preview") or (
+        tutorial_content[:1000] if tutorial_exists else "No tutorial generated yet."
+    )
 
-    Current State:
-    - Tutorial Generated: {tutorial_exists}
-    - Library: {library_name if library_name else "None"}
-    - Index Available: {bool(index_id)}
-    Generated Tutorial Preview:
-    {tutorial_content[:1000] if tutorial_exists else "No tutorial generated yet."}
-    {history_text}
-    Process the user's message and respond appropriately. Use the conversation history to understand context from previous messages.
-    """
+    return _CHAT_CONTEXT_TEMPLATE.substitute(
+        user_message=state["user_query"],
+        tutorial_exists=tutorial_exists,
+        library=state["lib_name"] or "None",
+        index_available=bool(state["doc_index_id"]),
+        tutorial_preview=tutorial_preview,
+        history=_format_history(state.get("chat_history", [])),
+    )
+
+
+def _decision_to_command(decision: ChatResponse) -> Command:
+    """Route the chat agent's decision to the next node."""
+    if decision.action == "generate_tutorial":
+        response = decision.response_message
+        return Command(
+            goto = "version_agent",
+            update = {
+                "lib_name": decision.lib_name,
+                "target_language": decision.target_language,
+                "user_intent": "generate_tutorial",
+                "session_mode": "generating",
+                "qa_response": response,  # Confirmation message
+                "current_agent": "chat_agent"
+            }
+
+        )
+    elif decision.action == "answer_question":
+        full_response = decision.response_message
+        if decision.additional_code :
+            full_response += f"\n\n```{decision.additional_code}\n```"
+
+        return Command(
+            goto = "__end__",
+            update = {
+                "qa_response": full_response,
+                "user_intent": "ask_question",
+                "session_mode": "interactive",
+                "current_agent": "chat_agent"
+            }
+        )
+    else :
+        return Command(
+            goto = "__end__",
+            update = {
+                "qa_response": decision.response_message,
+                "user_intent": "unclear",
+                "session_mode": "interactive",
+                "current_agent": "chat_agent"
+            }
+        )
+
+
+def _failure_command(e: Exception) -> Command:
+    logger.error(f"Chat agent failed: {e}")
+    return Command(
+        goto = "__end__",
+        update = {**_FAILURE_UPDATE, "errors": [f"Chat agent failed : {str(e)}"]}
+    )
+
+
+def _fast_path_command(state: AgentState) -> Optional[Command]:
+    """Route plain tutorial requests without the LLM; None when the message needs it."""
+    decision = _match_tutorial_request(state["user_query"])
+    if not decision:
+        return None
+    logger.info(f"Chat agent fast path: generate_tutorial, Library: {decision.lib_name}")
+    return _decision_to_command(decision)
+
+
+def _result_command(result: Dict) -> Command:
+    decision = result["structured_response"]
+    logger.info(f"Chat agent decision: {decision.action}, Library: {decision.lib_name}")
+    return _decision_to_command(decision)
+
+
+async def chat_agent_node(state:AgentState, config: RunnableConfig):
+    logger.info(f"Chat agent processing query: {state['user_query']}")
+
+    command = _fast_path_command(state)
+    if command:
+        return command
 
     try:
         result = await chat_agent.ainvoke({
             "messages":[
                 {
                     "role":"user",
-                    "content":context
+                    "content":_build_chat_context(state)
                 }
             ]
         
         }, config=config)
-        decision = result["structured_response"]
-        logger.info(f"Chat agent decision: {decision.action}, Library: {decision.lib_name}")
-        
-        if decision.action == "generate_tutorial":
-            response = decision.response_message
-            return Command(
-                goto = "version_agent",
-                update = {
-                    "lib_name": decision.lib_name,
-                    "target_language": decision.target_language,
-                    "user_intent": "generate_tutorial",
-                    "session_mode": "generating",
-                    "qa_response": response,  # Confirmation message
-                    "current_agent": "chat_agent"
-                }
+        return _result_command(result)
 
-            )
-        elif decision.action == "answer_question":
-            full_response = decision.response_message
-            if decision.additional_code :
-                full_response += f"\n\n```{decision.additional_code}\n```"
-
-            return Command(
-                goto = "__end__",
-                update = {
-                    "qa_response": full_response,
-                    "user_intent": "ask_question",
-                    "session_mode": "interactive",
-                    "current_agent": "chat_agent"
-                }
-            )
-        else :
-            return Command(
-                goto = "__end__",
-                update = {
-                    "qa_response": decision.response_message,
-                    "user_intent": "unclear",
-                    "session_mode": "interactive",
-                    "current_agent": "chat_agent"
-                }
-            )
-        
     except Exception as e:
-        logger.error(f"Chat agent failed: {e}")
-        return Command(
-            goto = "__end__",
-            update = {
-                "qa_response": "I'm having trouble understanding. Could you rephrase your request",
-                "errors": [f"Chat agent failed : {str(e)}"],
-                "current_agent": "chat_agent"
-            }
-        )
\ No newline at end of file
+        return _failure_command(e)
+
+
+async def chat_agent_batch(states: List[AgentState], config: RunnableConfig, max_concurrency: int = 10) -> List[Command]:
+    """Process several queued chat states, sending the ones that need the LLM in one `abatch` call.
+
+    Meant for dataset-scale evaluation or serving multiple sessions at once. Each state takes
+    the same path as in chat_agent_node; concurrency is bounded by `max_concurrency` and the
+    shared model rate limiter. Returns one Command per input state, in order.
+    """
+    logger.info(f"Chat agent batch processing {len(states)} queries")
+    commands: List[Optional[Command]] = [_fast_path_command(state) for state in states]
+    pending = [i for i, command in enumerate(commands) if command is None]
+    if pending:
+        results = await chat_agent.abatch(
+            [{"messages": [{"role": "user", "content": _build_chat_context(states[i])}]} for i in pending],
+            config={**config, "max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+        for i, result in zip(pending, results):
+            if isinstance(result, Exception):
+                commands[i] = _failure_command(result)
+                continue
+            try:
+                commands[i] = _result_command(result)
+            except Exception as e:
+                commands[i] = _failure_command(e)
+    return commands
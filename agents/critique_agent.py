@@ -7,9 +7,20 @@ from graphs.state import AgentState
 from config.models import model
 from config.logger import setup_logger
 from tools.llamaindex_manager import query_index
+from tools.code_validator import find_code_block_errors
+import asyncio
 
 logger = setup_logger(__name__)
 
+# Independent index lookups the critique needs on every pass — fanned out before the LLM turn
+VALIDATION_CHECKS = ["deprecated methods", "breaking changes", "syntax", "structure"]
+MAX_EXCERPT_CHARS = 3000
+# chat_agent shows this much of the final tutorial on every turn, so it's sliced once here
+PREVIEW_CHARS = 1000
+
+_BASE_UPDATE = {"current_agent": "critique_agent"}
+_FAILURE_UPDATE = {**_BASE_UPDATE, "validation_passed": False}
+
 
 class CritiqueStateUpdate(BaseModel):
     """Validation results and decision of crituque agent."""
@@ -45,9 +56,36 @@ critique_agent = create_agent(
     - 'Line 45: Remove usage of deprecated method X, use Y instead'
     - 'Code block 2: Add explanation of what the code does'
     If approving, set critique_feedback to 'APPROVED' and copy tutorial_draft to final_markdown
+
+    Index excerpts for deprecated methods, breaking changes, syntax and structure are pre-fetched
+    and included in the context. Only call `query_index` if they do not cover what you need.
+    Python and JavaScript code blocks are already parsed; any syntax errors found are listed in the
+    context, so you don't need to re-check syntax of blocks that are not listed.
     """
 )
 
+
+async def gather_validation_context(index_name: str, library_name: str) -> str:
+    """Run the VALIDATION_CHECKS lookups against the index concurrently and format the excerpts."""
+    results = await asyncio.gather(
+        *[
+            query_index.ainvoke({
+                "index_name": index_name,
+                "query": f"{library_name} {check}",
+                "doc_type_filter": "documentation",
+            })
+            for check in VALIDATION_CHECKS
+        ],
+        return_exceptions=True,
+    )
+    sections = []
+    for check, result in zip(VALIDATION_CHECKS, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Validation lookup '{check}' failed: {result}")
+            continue
+        sections.append(f"[{check}]\n{result[:MAX_EXCERPT_CHARS]}")
+    return "\n\n".join(sections)
+
 async def critique_agent_node(state:AgentState, config: RunnableConfig) -> Command[Literal["writer_agent", "__end__"]]:
     logger.info(f"Critique agent started for iteration: {state.get('iteration_count')}")
     max_iterations = state.get("max_iterations",3)
@@ -58,6 +96,7 @@ async def critique_agent_node(state:AgentState, config: RunnableConfig) -> Comma
             goto = "__end__",
             update = {
                 "final_markdown": state["tutorial_draft"],
+                "final_markdown_preview": (state["tutorial_draft"] or "")[:PREVIEW_CHARS],
                 "validation_passed":False,
                 "errors": ["Max iteration reached. Tutorial may have issues."],
                 "current_agent": "critique_agent"
@@ -66,6 +105,13 @@ async def critique_agent_node(state:AgentState, config: RunnableConfig) -> Comma
     tutorial = state["tutorial_draft"]
     # changelog is now in the index, so we pass the index id
     doc_index_id = state.get("doc_index_id")
+    # writer_agent normally pre-fetches this while drafting; only look it up here as a fallback
+    validation_context = state.get("validation_context") or ""
+    if doc_index_id and not validation_context:
+        validation_context = await gather_validation_context(doc_index_id, state["lib_name"])
+    syntax_errors = find_code_block_errors(tutorial or "")
+    if syntax_errors:
+        logger.info(f"Static check found {len(syntax_errors)} code block syntax error(s)")
     
     context = f"""Tutorial to validate:
     ---
@@ -78,6 +124,12 @@ async def critique_agent_node(state:AgentState, config: RunnableConfig) -> Comma
     language:{state["target_language"]}
     index_name:{doc_index_id}
     current iteration:{current_iteration}/{max_iterations}
+
+    Pre-fetched index excerpts:
+    {validation_context or "None available."}
+
+    Static syntax check of code blocks:
+    {chr(10).join(syntax_errors) if syntax_errors else "No syntax errors found."}
     Perform comprehensive validation"""
 
     try:
@@ -89,11 +141,12 @@ async def critique_agent_node(state:AgentState, config: RunnableConfig) -> Comma
 
             }, config=config)
         updates = result["structured_response"]
-        state_updates = updates.model_dump()
-        state_updates["current_agent"]= "critique_agent"
+        # trusted: already validated by create_agent, so skip the model_dump() serialization pass
+        state_updates = {**updates.__dict__, **_BASE_UPDATE}
 
         if updates.next_action =="approve":
             logger.info("Critique agent approved the tutorial")
+            state_updates["final_markdown_preview"] = updates.final_markdown[:PREVIEW_CHARS]
             return Command(
                 goto = "__end__",
                 update = state_updates
@@ -111,9 +164,9 @@ async def critique_agent_node(state:AgentState, config: RunnableConfig) -> Comma
         return Command(
             goto = "__end__" ,
             update = {
+                **_FAILURE_UPDATE,
                 "final_markdown": tutorial,
-                "validation_passed": False,
+                "final_markdown_preview": (tutorial or "")[:PREVIEW_CHARS],
                 "errors":[f"critique agent failed : {str(e)}"],
-                "current_agent": "critique_agent"
             }
         )
@@ -3,16 +3,20 @@ from typing import List, Dict, Any, Literal, Optional
 from langchain.agents import create_agent
 from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command
+import asyncio
 from graphs.state import AgentState
 from config.models import model
 from tools.github_tool import github_search
-from tools.doc_scraper import scrape_documentation , discover_doc_navigation_links
-from tools.tavily_search import web_search
+from tools.doc_scraper import scrape_documentation_batch , discover_doc_navigation_links, scrape_and_discover
+from tools.tavily_search import web_search, web_search_batch
 from tools.llamaindex_manager import build_and_index
+from agents.writer_agent import draft_intro_sections
 from config.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+_FAILURE_UPDATE = {"current_agent": "research_agent"}
+
 
 class ResearchStateUpdate(BaseModel):
     """Verified research results — URLs and summaries only, no raw content."""
@@ -40,7 +44,7 @@ class ResearchStateUpdate(BaseModel):
 # NOTE: create_index is NOT a tool — indexing happens outside the agent
 research_agent = create_agent(
     model=model,
-    tools = [web_search, scrape_documentation,
+    tools = [web_search, web_search_batch, scrape_and_discover, scrape_documentation_batch,
              discover_doc_navigation_links, github_search],
     response_format = ResearchStateUpdate,
     system_prompt = """You are a research agent that discovers and VERIFIES documentation and code.
@@ -50,11 +54,15 @@ research_agent = create_agent(
     Do NOT repeat or summarize scraped content in your messages — just verify and move on.
     
     Strategy:
-    1. Scrape the provided documentation URL. Use discover_doc_navigation_links to find
-       more pages. Scrape 3-5 key pages (installation, getting started, API reference).
+    1. Use scrape_and_discover on the provided documentation URL: it scrapes the page and
+       finds its navigation links in one call. Then scrape 3-5 key pages (installation,
+       getting started, API reference) in ONE call: scrape_documentation_batch(['url1', 'url2', 'url3']).
+       Do not scrape pages one at a time.
     2. If docs are insufficient, use web_search to find alternatives.
     3. Use github_search to find code snippets using the library.
-    4. Use web_search to find the library's changelog/release notes URL.
+    4. Use web_search to find the library's changelog/release notes URL. When you need
+       several searches (e.g. alternatives and the changelog), run them in ONE call:
+       web_search_batch(['query1', 'query2']).
     5. Return the verified URLs (not content) and a brief research summary.
     
     Quality checks:
@@ -68,6 +76,7 @@ async def research_agent_node(state: AgentState, config: RunnableConfig) -> Comm
     version = state['target_version']
     language = state['target_language']
     doc_url = state['docs_url']
+    prefetched_doc = state.get('prefetched_doc')
 
     context = f"""library: {library_name}
     version: {version}
@@ -77,6 +86,14 @@ async def research_agent_node(state: AgentState, config: RunnableConfig) -> Comm
     Task: Find and verify documentation pages and code snippets for a tutorial.
     Return verified URLs — the indexing will be done separately."""
 
+    # version_agent already scraped the docs URL — hand over its preview instead of re-scraping
+    if prefetched_doc and prefetched_doc.get('url') == doc_url:
+        context += f"""
+
+    The official documentation URL was already scraped and verified. Preview:
+    {prefetched_doc.get('content_preview', '')}
+    Do NOT scrape it again — use discover_doc_navigation_links on it to find more pages."""
+
     try:
         result = await research_agent.ainvoke({
             "messages":[
@@ -93,13 +110,18 @@ async def research_agent_node(state: AgentState, config: RunnableConfig) -> Comm
             f"Research complete. Indexing {len(updates.verified_doc_urls)} docs "
             f"and {len(updates.code_snippets)} snippets..."
         )
-        index_name = await build_and_index(
-            library_name=library_name,
-            version=version or "latest",
-            language=language or "python",
-            verified_doc_urls=updates.verified_doc_urls,
-            code_snippets=[s for s in updates.code_snippets],
-            changelog_url=updates.changelog_url,
+        # Introduction/Installation only need version metadata, so the writer's first
+        # sections are drafted while the (slow) embedding step runs
+        index_name, intro_draft = await asyncio.gather(
+            build_and_index(
+                library_name=library_name,
+                version=version or "latest",
+                language=language or "python",
+                verified_doc_urls=updates.verified_doc_urls,
+                code_snippets=[s for s in updates.code_snippets],
+                changelog_url=updates.changelog_url,
+            ),
+            draft_intro_sections(state, updates.research_summary, config),
         )
         logger.info(f"Index created: {index_name}")
 
@@ -113,6 +135,7 @@ async def research_agent_node(state: AgentState, config: RunnableConfig) -> Comm
             ],
             "code_snippets": updates.code_snippets,
             "research_summary": updates.research_summary,
+            "intro_draft": intro_draft,
             "changelog_content": updates.changelog_url,  # just the URL
             "current_agent": "research_agent",
         }
@@ -125,8 +148,5 @@ async def research_agent_node(state: AgentState, config: RunnableConfig) -> Comm
         logger.error(f"Research agent failed: {e}")
         return Command(
             goto = "__end__",
-            update = {
-                "errors": [f"Research agent failed: {str(e)}"],
-                "current_agent": "research_agent",
-            }
+            update = {**_FAILURE_UPDATE, "errors": [f"Research agent failed: {str(e)}"]}
         )
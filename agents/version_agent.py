@@ -1,20 +1,26 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Optional, Literal, Dict, Any
 from langchain.agents import create_agent
 from langgraph.types import Command
 from langchain_core.runnables import RunnableConfig
 from graphs.state import AgentState
 from config.models import model
 from tools.version_checker import (
+    checker,
     detect_language,
     get_latest_version,
     close_version_checker,
 )
+from tools.doc_scraper import scrape_documentation
 from tools.tavily_search import web_search
 from config.logger import setup_logger
+import asyncio
 
 logger = setup_logger(__name__)
 
+_BASE_UPDATE = {"current_agent": "version_agent"}
+_FAILURE_UPDATE = {**_BASE_UPDATE, "version_status": "failed"}
+
 
 class VersionStateUpdate(BaseModel):
     """Complete version data required for research phase"""
@@ -49,10 +55,28 @@ version_agent = create_agent(
     3. If any critical information (like version number, repository URL, or docs URL) is missing, use the web_search tool to find this information from the web.
     4. Update the version_status to 'confirmed' only when all required information is gathered. If the library cannot be found or an error occurs, set version_status to 'failed' and provide an appropriate error message.
     5. Ensure all URLs are valid and the release date is in ISO format (YYYY-MM-DD).
-    6. Always return in the VersionStateUpdate format with all fields populated to the best of your ability.""",
+    6. Always return in the VersionStateUpdate format with all fields populated to the best of your ability.
+    If pre-fetched registry data is provided in the message, trust it and only call tools for the fields it is missing.""",
 )
 
 
+async def _prefetch_registry_info(library_name: str, language: Optional[str]) -> Dict[str, Any]:
+    """Query PyPI and npm concurrently so the agent can skip those tool round-trips.
+
+    Mirrors the detect_language -> get_latest_version strategy of the agent: a library
+    found on both registries defaults to Python.
+    """
+    languages = [language] if language else ["python", "javascript"]
+    results = await asyncio.gather(
+        *[checker.get_latest_version(library_name, lang) for lang in languages],
+        return_exceptions=True,
+    )
+    for lang, info in zip(languages, results):
+        if isinstance(info, dict) and info.get("version") and "error" not in info:
+            return {"language": lang, **info}
+    return {}
+
+
 async def version_agent_node(
     state: AgentState,
     config: RunnableConfig,
@@ -62,13 +86,27 @@ async def version_agent_node(
     library_name = state["lib_name"]
     logger.info(f"Version agent started for library: {library_name}")
 
+    # Speculatively scrape the registry's docs URL while the LLM is still deciding;
+    # research_agent reuses the preview instead of scraping the same page again.
+    scrape_task = None
     try:
+        prefetched = await _prefetch_registry_info(library_name, state.get("target_language"))
+        prefetched_docs_url = prefetched.get("docs_url")
+        if prefetched_docs_url:
+            scrape_task = asyncio.create_task(
+                scrape_documentation.ainvoke({"url": prefetched_docs_url})
+            )
+
+        content = f"Get the complete version information for the library '{library_name}'"
+        if prefetched:
+            content += f"\n\nPre-fetched registry data:\n{prefetched}"
+
         result = await version_agent.ainvoke(
             {
                 "messages": [
                     {
                         "role": "user",
-                        "content": f"Get the complete version information for the library '{library_name}'",
+                        "content": content,
                     }
                 ]
             },
@@ -76,9 +114,13 @@ async def version_agent_node(
         )
         updates = result["structured_response"]
         logger.info(f"Version agent found version: {updates.target_version}, Status: {updates.version_status}")
-        state_updates = updates.model_dump()
-        state_updates["lib_name"] = library_name
-        state_updates["current_agent"] = "version_agent"
+        # trusted: validated by create_agent; fields are flat, no model_dump() needed
+        state_updates = {**updates.__dict__, **_BASE_UPDATE, "lib_name": library_name}
+
+        if scrape_task and updates.version_status == "confirmed" and updates.docs_url == prefetched_docs_url:
+            prefetched_doc = await scrape_task
+            if prefetched_doc.get("success"):
+                state_updates["prefetched_doc"] = prefetched_doc
         return Command(
             goto=(
                 "research_agent"
@@ -91,9 +133,9 @@ async def version_agent_node(
         logger.error(f"Version agent failed: {e}")
         return Command(
             goto="__end__",
-            update={
-                "errors": [f"Version agent failed: {str(e)}"],
-                "version_status": "failed",
-                "current_agent": "version_agent",
-            },
+            update={**_FAILURE_UPDATE, "errors": [f"Version agent failed: {str(e)}"]},
         )
+    finally:
+        # Drop the speculative scrape if the agent failed or settled on a different docs URL
+        if scrape_task and not scrape_task.done():
+            scrape_task.cancel()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import Literal, List, Optional
 from langchain.agents import create_agent
 from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command
@@ -7,9 +7,13 @@ from graphs.state import AgentState
 from config.models import model
 from config.logger import setup_logger
 from tools.llamaindex_manager import query_index
+from agents.critique_agent import gather_validation_context
+import asyncio
 
 logger = setup_logger(__name__)
 
+_BASE_UPDATE = {"current_agent": "writer_agent"}
+
 class TutorialStateUpdate(BaseModel):
     """Complete tutorial state with metadata."""
     tutorial_draft:str = Field(description="Complete tutorial draft with installation, concepts, and 3 to 5 code examples in a markdown format.")
@@ -60,8 +64,36 @@ writer_agent = create_agent(
     """
 )
 
-async def writer_agent_node(state: AgentState, config: RunnableConfig) -> Command[Literal["critique_agent", "__end__"]]:
-    logger.info(f"Writer agent started for library: {state['lib_name']}")
+async def draft_intro_sections(state: AgentState, research_summary: str, config: RunnableConfig) -> Optional[str]:
+    """Draft the Introduction and Installation sections, which only need version metadata.
+
+    research_agent runs this while the vector index is still being built, so the
+    writer only has to produce the sections that depend on indexed docs and snippets.
+    """
+    prompt = f"""Write ONLY the first two sections of a beginner-friendly "Getting started" Markdown tutorial.
+
+library : {state['lib_name']}
+version : {state['target_version']}
+language : {state['target_language']}
+package manager : {state['package_manager']}
+documentation : {state['docs_url']}
+research_summary : {research_summary}
+
+1. # Introduction (1 paragraph) - what the library does and its key use cases
+2. # Installation - version specific installation commands and any prerequisites
+
+Use the specific version number in install commands. Do not write any other section
+and do not start with a horizontal rule."""
+    try:
+        response = await model.ainvoke(prompt, config=config)
+        return response.content if isinstance(response.content, str) else None
+    except Exception as e:
+        logger.warning(f"Intro pre-draft failed, writer will draft it from scratch: {e}")
+        return None
+
+
+def _build_writer_context(state: AgentState) -> str:
+    """Build the writer prompt, including critique feedback on revisions."""
     library_name = state['lib_name']
     version = state['target_version']
     language = state['target_language']
@@ -70,8 +102,18 @@ async def writer_agent_node(state: AgentState, config: RunnableConfig) -> Comman
     research_summary = state['research_summary']
 
     is_revision = bool(state['critique_feedback'])
+    intro_draft = state.get('intro_draft')
+
+    if is_revision:
+        task = f"REVISION NEEDED - Adress this feedback:\n{state['critique_feedback']}"
+    elif intro_draft:
+        task = f"""Sections 1-2 are already drafted. Keep them as the start of the tutorial (fix them only if wrong)
+and write the remaining sections:
+{intro_draft}"""
+    else:
+        task = "Create a new tutorial from scratch"
 
-    context = f"""
+    return f"""
 library : {library_name}
 version : {version}
 language : {language}
@@ -79,34 +121,96 @@ package manager : {package_manager}
 index_id : {index_id}
 research_summary : {research_summary}
 
-{f"REVISION NEEDED - Adress this feedback:\n{state['critique_feedback']}" if is_revision else "Create a new tutorial from scratch"}
+{task}
 
 Generate a complete "Getting started" tutorial in markdown format."""
-    
+
+
+def _writer_command(state: AgentState, updates: TutorialStateUpdate, validation_context: Optional[str] = None) -> Command:
+    # trusted: output of our own pydantic validator — a shallow copy is enough
+    state_updates = {
+        **updates.__dict__,
+        **_BASE_UPDATE,
+        "iteration_count": state.get("iteration_count",0) + 1,
+    }
+    if validation_context is not None:
+        state_updates["validation_context"] = validation_context
+    return Command(
+        goto = "critique_agent",
+        update = state_updates
+    )
+
+
+def _failure_command(e: Exception) -> Command:
+    logger.error(f"Writer agent failed: {e}")
+    return Command(
+        goto = "critique_agent",
+        update = {**_BASE_UPDATE, "errors": [f"Writer agent failed: {str(e)}"]}
+    )
+
+
+def _start_validation_prefetch(state: AgentState) -> Optional[asyncio.Task]:
+    # The critique's index lookups only depend on the index and library, not on the draft,
+    # so run them while the writer is decoding instead of after it.
+    if state.get("doc_index_id") and not state.get("validation_context"):
+        return asyncio.create_task(
+            gather_validation_context(state["doc_index_id"], state["lib_name"])
+        )
+    return None
+
+
+async def writer_agent_node(state: AgentState, config: RunnableConfig) -> Command[Literal["critique_agent", "__end__"]]:
+    logger.info(f"Writer agent started for library: {state['lib_name']}")
+
+    validation_task = _start_validation_prefetch(state)
+
     try:
         result = await writer_agent.ainvoke({
             "messages":[
                 {
                     "role":"user",
-                    "content":context
+                    "content":_build_writer_context(state)
                 }
             ]
         }, config=config)
-        updates = result["structured_response"]
-        state_updates = updates.model_dump()
-        state_updates["current_agent"] = "writer_agent"
-        state_updates["iteration_count"] = state.get("iteration_count",0) + 1
-        return Command(
-            goto = "critique_agent",
-            update = state_updates
-        )
+        validation_context = await validation_task if validation_task else None
+        return _writer_command(state, result["structured_response"], validation_context)
     
     except Exception as e:
-        logger.error(f"Writer agent failed: {e}")
-        return Command(
-            goto = "critique_agent",
-            update = {
-                "errors": [f"Writer agent failed: {str(e)}"],
-                "current_agent": "writer_agent"
-            }
-        )
\ No newline at end of file
+        return _failure_command(e)
+    finally:
+        if validation_task and not validation_task.done():
+            validation_task.cancel()
+
+
+async def writer_agent_batch(states: List[AgentState], config: RunnableConfig, max_concurrency: int = 10) -> List[Command]:
+    """Draft tutorials for several states with a single `abatch` call.
+
+    The writer is the most expensive node, so batching amortizes the per-request overhead
+    when generating many tutorials at once. Each state gets the same validation-context
+    prefetch as in writer_agent_node. Returns one Command per input state, in order.
+    """
+    logger.info(f"Writer agent batch drafting {len(states)} tutorials")
+    validation_tasks = [_start_validation_prefetch(state) for state in states]
+    try:
+        results = await writer_agent.abatch(
+            [{"messages": [{"role": "user", "content": _build_writer_context(state)}]} for state in states],
+            config={**config, "max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
+
+        commands = []
+        for state, result, validation_task in zip(states, results, validation_tasks):
+            if isinstance(result, Exception):
+                commands.append(_failure_command(result))
+                continue
+            try:
+                validation_context = await validation_task if validation_task else None
+                commands.append(_writer_command(state, result["structured_response"], validation_context))
+            except Exception as e:
+                commands.append(_failure_command(e))
+        return commands
+    finally:
+        for validation_task in validation_tasks:
+            if validation_task and not validation_task.done():
+                validation_task.cancel()
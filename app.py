@@ -4,10 +4,17 @@ Run with: streamlit run app.py
 """
 import streamlit as st
 import asyncio
+import atexit
+import concurrent.futures
 import os
+import queue
+import threading
+import uuid
+from pathlib import Path
 from dotenv import load_dotenv
 from config.logger import setup_logger
 from config.langfuse_config import get_langfuse_config, flush_langfuse_traces
+from session_store import SessionStore
 
 
 load_dotenv()
@@ -21,132 +28,49 @@ st.set_page_config(
 )
 
 # ── Custom CSS ───────────────────────────────────────────────────────────
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
-
-*, html, body, [class*="st-"] { font-family: 'Inter', sans-serif; }
-.stApp { background: linear-gradient(160deg, #0a0a0f 0%, #121220 40%, #0d1117 100%); }
-#MainMenu, footer, header { visibility: hidden; }
-.block-container { padding-top: 2rem; }
-
-/* ── Landing page ── */
-.landing-container {
-    display: flex; flex-direction: column; align-items: center;
-    justify-content: center; min-height: 70vh; text-align: center;
-    animation: fadeIn 0.8s ease-out;
-}
-@keyframes fadeIn {
-    from { opacity: 0; transform: translateY(20px); }
-    to   { opacity: 1; transform: translateY(0); }
-}
-.logo-placeholder {
-    width: 90px; height: 90px; border-radius: 22px;
-    background: linear-gradient(135deg, #667eea, #764ba2);
-    display: flex; align-items: center; justify-content: center;
-    font-size: 40px; margin-bottom: 1.2rem;
-    box-shadow: 0 8px 32px rgba(102,126,234,0.30);
-}
-.brand-title {
-    font-size: 2.8rem; font-weight: 800;
-    background: linear-gradient(135deg, #667eea 0%, #a78bfa 50%, #f093fb 100%);
-    -webkit-background-clip: text; -webkit-text-fill-color: transparent;
-    margin-bottom: 0.3rem; letter-spacing: -1px;
-}
-.brand-subtitle {
-    color: #8b8fa3; font-size: 1.05rem; font-weight: 400;
-    margin-bottom: 2.5rem; max-width: 480px;
-}
+@st.cache_data
+def load_css() -> str:
+    """Read the stylesheet once per process instead of on every rerun."""
+    return (Path(__file__).parent / "static" / "devagent.css").read_text(encoding="utf-8")
 
-/* ── Chat messages ── */
-.chat-msg {
-    display: flex; gap: 12px; margin-bottom: 1rem;
-    animation: msgSlide 0.35s ease-out;
-}
-@keyframes msgSlide {
-    from { opacity: 0; transform: translateY(8px); }
-    to   { opacity: 1; transform: translateY(0); }
-}
-.chat-msg.user { flex-direction: row-reverse; }
-.chat-msg.user .msg-bubble {
-    background: linear-gradient(135deg, #667eea, #764ba2);
-    color: #fff; border-radius: 18px 18px 4px 18px; max-width: 75%;
-}
-.chat-msg.agent .msg-bubble {
-    background: rgba(255,255,255,0.06);
-    border: 1px solid rgba(255,255,255,0.08);
-    color: #e1e4eb; border-radius: 18px 18px 18px 4px; max-width: 75%;
-}
-.msg-bubble { padding: 12px 18px; font-size: 0.92rem; line-height: 1.55; }
-.msg-avatar {
-    width: 34px; height: 34px; border-radius: 50%;
-    display: flex; align-items: center; justify-content: center;
-    font-size: 16px; flex-shrink: 0; margin-top: 2px;
-}
-.msg-avatar.user-av  { background: linear-gradient(135deg, #667eea, #764ba2); }
-.msg-avatar.agent-av { background: rgba(255,255,255,0.08); border: 1px solid rgba(255,255,255,0.12); }
-
-/* ── Live progress ("thinking") ── */
-.thinking-box {
-    background: rgba(102,126,234,0.06);
-    border: 1px solid rgba(102,126,234,0.15);
-    border-radius: 14px; padding: 14px 18px; margin: 0.8rem 0;
-}
-.thinking-header {
-    color: #a78bfa; font-weight: 600; font-size: 0.88rem;
-    margin-bottom: 10px; display: flex; align-items: center; gap: 6px;
-}
-.step-item {
-    display: flex; align-items: center; gap: 8px;
-    padding: 5px 0; font-size: 0.84rem; color: #8b8fa3;
-}
-.step-item.done   { color: #6ee7b7; }
-.step-item.active { color: #e1e4eb; font-weight: 500; }
-.step-dot {
-    width: 8px; height: 8px; background: #667eea;
-    border-radius: 50%; animation: pulse 1.2s infinite; flex-shrink: 0;
-}
-@keyframes pulse { 0%,100% { opacity:1; } 50% { opacity:0.3; } }
 
-/* ── Collapsed thinking (after completion) ── */
-.thinking-collapsed {
-    background: rgba(102,126,234,0.04);
-    border: 1px solid rgba(102,126,234,0.10);
-    border-radius: 12px; margin: 0.6rem 0; overflow: hidden;
-}
-.thinking-collapsed summary {
-    padding: 10px 16px; color: #8b8fa3; font-size: 0.82rem;
-    cursor: pointer; display: flex; align-items: center; gap: 6px;
-    list-style: none; user-select: none;
-}
-.thinking-collapsed summary::-webkit-details-marker { display: none; }
-.thinking-collapsed summary::before {
-    content: '▸'; font-size: 10px; transition: transform 0.2s;
-}
-.thinking-collapsed[open] summary::before { transform: rotate(90deg); }
-.thinking-collapsed .steps-inner { padding: 0 16px 12px 16px; }
-
-/* ── Streamlit input overrides ── */
-.stChatInput > div {
-    border-radius: 16px !important;
-    border: 1px solid rgba(255,255,255,0.10) !important;
-    background: rgba(255,255,255,0.04) !important;
-}
-.stChatInput textarea { color: #e1e4eb !important; }
-</style>
-""", unsafe_allow_html=True)
+# Streamlit drops elements that a rerun does not emit again, so the <style> tag is sent on every run
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
 
 
 # ── Session state init ───────────────────────────────────────────────────
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "chat_started" not in st.session_state:
-    st.session_state.chat_started = False
+# Number of chat messages rendered per rerun; "Load earlier messages" extends it by this much
+MESSAGE_WINDOW = 50
+
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    return SessionStore()
+
+
+# The session id lives in the URL so a refresh (or a restarted server) finds the same session
+if "session_id" not in st.session_state:
+    if "session" not in st.query_params:
+        st.query_params["session"] = uuid.uuid4().hex
+    st.session_state.session_id = st.query_params["session"]
+    stored = get_session_store().get(st.session_state.session_id) or {}
+    st.session_state.messages = stored.get("messages", [])
+    # Persist key workflow results across follow-up messages
+    st.session_state.last_result = stored.get("last_result", {})
+    st.session_state.chat_started = bool(st.session_state.messages)
+
 if "processing" not in st.session_state:
     st.session_state.processing = False
-# Persist key workflow results across follow-up messages
-if "last_result" not in st.session_state:
-    st.session_state.last_result = {}
+if "message_window" not in st.session_state:
+    st.session_state.message_window = MESSAGE_WINDOW
+
+
+def save_session():
+    """Write the session's messages and last result to the out-of-process store."""
+    get_session_store().put(st.session_state.session_id, {
+        "messages": st.session_state.messages,
+        "last_result": st.session_state.last_result,
+    })
 
 logger = setup_logger(__name__)
 
@@ -160,69 +84,119 @@ STEP_LABELS = {
     "critique_agent": ("🧐", "Validating & reviewing tutorial"),
 }
 
+# Seconds between progress polls; updates arriving in between are coalesced into one render
+RENDER_INTERVAL = 0.05
+
 
 # ── Helper: build initial AgentState ─────────────────────────────────────
+_HISTORY_ROLES = frozenset({"user", "agent"})
+
+# Results carried over from the previous run so follow-ups can build on them
+_CARRYOVER_KEYS = frozenset({
+    "lib_name", "target_language", "target_version", "package_manager", "release_date",
+    "repository_url", "docs_url", "doc_index_id", "research_summary", "final_markdown",
+    "final_markdown_preview", "metadata", "session_mode",
+})
+
+# Immutable defaults for a fresh run; list/dict fields are created per call instead
+_DEFAULT_STATE = {
+    "lib_name": "",
+    "target_language": None,
+    "target_version": None,
+    "version_status": "pending",
+    "package_manager": None,
+    "release_date": None,
+    "repository_url": None,
+    "docs_url": None,
+    "doc_content": None,
+    "doc_index_id": None,
+    "prefetched_doc": None,
+    "changelog_content": None,
+    "research_summary": None,
+    "intro_draft": None,
+    "validation_context": None,
+    "tutorial_draft": None,
+    "critique_feedback": None,
+    "validation_passed": None,
+    "next_action": None,
+    "current_agent": "chat_agent",
+    "iteration_count": 0,
+    "max_iterations": 3,
+    "is_complete": False,
+    "final_markdown": None,
+    "final_markdown_preview": None,
+    "qa_response": None,
+    "user_intent": None,
+    "session_mode": None,
+}
+
+
 def build_initial_state(user_query: str) -> dict:
-    # Get last 5 messages for conversation memory
-    recent = st.session_state.messages[-10:]  # last 5 pairs (user+agent)
+    # Last 5 pairs (user+agent) for conversation memory; the slice already caps it at 10
     chat_history = [
         {"role": m["role"], "content": m["content"]}
-        for m in recent
-        if m["role"] in ("user", "agent")
-    ][-10:]  # cap at 10 entries
+        for m in st.session_state.messages[-10:]
+        if m["role"] in _HISTORY_ROLES
+    ]
 
     # Carry over key results from previous runs
     prev = st.session_state.last_result
 
     return {
-        "lib_name": prev.get("lib_name", ""),
-        "user_query": user_query,
-        "target_language": prev.get("target_language"),
-        "target_version": prev.get("target_version"),
-        "version_status": "pending",
-        "package_manager": prev.get("package_manager"),
-        "release_date": prev.get("release_date"),
-        "repository_url": prev.get("repository_url"),
-        "docs_url": prev.get("docs_url"),
-        "doc_content": None,
-        "doc_index_id": prev.get("doc_index_id"),
+        **_DEFAULT_STATE,
         "github_repos": [],
         "code_snippets": [],
-        "changelog_content": None,
-        "research_summary": prev.get("research_summary"),
-        "tutorial_draft": None,
-        "critique_feedback": None,
-        "validation_passed": None,
         "issues_found": [],
-        "next_action": None,
-        "current_agent": "chat_agent",
-        "iteration_count": 0,
-        "max_iterations": 3,
-        "is_complete": False,
         "errors": [],
-        "final_markdown": prev.get("final_markdown"),
-        "metadata": prev.get("metadata", {}),
+        "metadata": {},
+        **{key: prev[key] for key in _CARRYOVER_KEYS & prev.keys()},
+        "user_query": user_query,
         "chat_history": chat_history,
-        "qa_response": None,
-        "user_intent": None,
-        "session_mode": prev.get("session_mode"),
     }
 
 
 # ── Helper: run workflow with live streaming ─────────────────────────────
-async def run_workflow_streaming(user_query: str, progress_container):
-    """Stream workflow execution and update progress in real-time."""
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """One long-lived event loop on a daemon thread, shared across reruns and sessions.
+
+    Keeps httpx connection pools and other loop-bound state alive between requests
+    instead of building and tearing down a loop with asyncio.run() on every submit.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="devagent-event-loop", daemon=True).start()
+    atexit.register(_shutdown_event_loop, loop)
+    return loop
+
+
+async def _close_http_clients():
+    from tools.http_client import close_http_client
+    from tools.github_tool import github_tool
+    from tools.version_checker import checker
+
+    await asyncio.gather(close_http_client(), github_tool.close(), checker.close(), return_exceptions=True)
+
+
+def _shutdown_event_loop(loop: asyncio.AbstractEventLoop):
+    """atexit hook: close the pooled HTTP clients on the background loop, then stop it."""
+    try:
+        asyncio.run_coroutine_threadsafe(_close_http_clients(), loop).result(timeout=5)
+    except Exception as e:
+        logger.warning(f"Failed to close HTTP clients on shutdown: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+async def run_workflow_streaming(initial_state: dict, config: dict, progress_queue: queue.SimpleQueue):
+    """Stream workflow execution, pushing (completed_steps, current_step) snapshots to progress_queue."""
     from graphs.workflow import build_devagent_workflow
-    from config.langfuse_config import get_langfuse_config
 
     app = build_devagent_workflow()
-    initial_state = build_initial_state(user_query)
 
     completed_steps = []
     current_step = None
     final_result = None
 
-    async for event in app.astream(initial_state, config=get_langfuse_config(), stream_mode="updates"):
+    async for event in app.astream(initial_state, config=config, stream_mode="updates"):
         for node_name, node_output in event.items():
             if node_name == "__end__":
                 continue
@@ -231,12 +205,8 @@ async def run_workflow_streaming(user_query: str, progress_container):
             if current_step and current_step != node_name:
                 completed_steps.append(current_step)
             current_step = node_name
-
-            # Render live progress
-            with progress_container:
-                _render_progress(completed_steps, current_step)
-
             final_result = node_output
+            progress_queue.put((tuple(completed_steps), current_step))
 
     # Mark last step as done
     if current_step:
@@ -245,34 +215,104 @@ async def run_workflow_streaming(user_query: str, progress_container):
     return final_result, completed_steps
 
 
-def _render_progress(completed_steps, current_step):
-    """Render the live step-by-step progress."""
-    lines = []
-    for step in completed_steps:
-        _, label = STEP_LABELS.get(step, ("⚙️", step))
-        lines.append(f'<div class="step-item done"><span>✅</span> {label}</div>')
-    if current_step:
-        _, label = STEP_LABELS.get(current_step, ("⚙️", current_step))
-        lines.append(f'<div class="step-item active"><span class="step-dot"></span> {label}</div>')
-
-    st.markdown(f"""
-    <div class="thinking-box">
+def run_workflow(user_query: str, progress_container):
+    """Run the workflow on the background loop and render its progress from the script thread.
+
+    Streamlit elements can only be drawn from the script thread, so the coroutine only
+    queues progress snapshots; they are drained here and coalesced into at most one
+    render per RENDER_INTERVAL, with a final render once the run finishes.
+    """
+    progress_queue = queue.SimpleQueue()
+    future = asyncio.run_coroutine_threadsafe(
+        run_workflow_streaming(
+            build_initial_state(user_query),
+            get_langfuse_config(st.session_state.session_id),
+            progress_queue,
+        ),
+        get_event_loop(),
+    )
+    renderer = ProgressRenderer(progress_container)
+    last_rendered = None
+
+    try:
+        while True:
+            finished = bool(concurrent.futures.wait([future], timeout=RENDER_INTERVAL).done)
+            snapshot = None
+            while not progress_queue.empty():
+                snapshot = progress_queue.get_nowait()
+            # A node can emit several updates without the visible step list changing
+            if snapshot and snapshot != last_rendered:
+                renderer.render(*snapshot)
+                last_rendered = snapshot
+            if finished:
+                return future.result()
+    finally:
+        # A rerun or Stop interrupts the script here; don't leave the run spending quota
+        # on the background loop for a result nobody will see
+        if not future.done():
+            future.cancel()
+
+
+class ProgressRenderer:
+    """Render the live step-by-step progress into a placeholder.
+
+    The box is split into two elements: the header + completed steps, which only grows,
+    and the active step. Each is re-sent only when its own HTML changes, so a step
+    transition doesn't re-ship the whole list. Completed step fragments are formatted once.
+    """
+
+    def __init__(self, placeholder):
+        box = placeholder.container()
+        self._done_box = box.empty()
+        self._active_box = box.empty()
+        self._done_html = []
+        self._done_rendered = None
+        self._active_step = None
+
+    def render(self, completed_steps, current_step):
+        for step in completed_steps[len(self._done_html):]:
+            _, label = STEP_LABELS.get(step, ("⚙️", step))
+            self._done_html.append(f'<div class="step-item done"><span>✅</span> {label}</div>')
+        if self._done_rendered != len(self._done_html):
+            self._done_rendered = len(self._done_html)
+            self._done_box.markdown(f"""
+    <div class="thinking-box thinking-top">
         <div class="thinking-header">⚡ Working on it…</div>
-        {"".join(lines)}
+        {"".join(self._done_html)}
     </div>
     """, unsafe_allow_html=True)
 
+        if current_step != self._active_step:
+            self._active_step = current_step
+            active_html = ""
+            if current_step:
+                _, label = STEP_LABELS.get(current_step, ("⚙️", current_step))
+                active_html = f'<div class="step-item active"><span class="step-dot"></span> {label}</div>'
+            self._active_box.markdown(
+                f'<div class="thinking-box thinking-bottom">{active_html}</div>',
+                unsafe_allow_html=True,
+            )
+
+
+def _format_errors(errors: list) -> str:
+    return "⚠️ Something went wrong:\n" + "\n".join(f"• {e}" for e in errors)
+
+
+# Result fields tried in order; the first non-empty one becomes the reply
+_RESPONSE_FORMATTERS = (
+    ("qa_response", str),
+    ("final_markdown", str),
+    ("tutorial_draft", str),
+    ("errors", _format_errors),
+)
+
 
 def get_agent_response(result: dict) -> str:
     """Extract the best response from the workflow result."""
-    if result.get("qa_response"):
-        return result["qa_response"]
-    if result.get("final_markdown"):
-        return result["final_markdown"]
-    if result.get("tutorial_draft"):
-        return result["tutorial_draft"]
-    if result.get("errors"):
-        return "⚠️ Something went wrong:\n" + "\n".join(f"• {e}" for e in result["errors"])
+    for key, formatter in _RESPONSE_FORMATTERS:
+        value = result.get(key)
+        if value:
+            return formatter(value)
     return "I couldn't process that request. Could you try rephrasing?"
 
 
@@ -330,8 +370,14 @@ else:
     </div>
     """, unsafe_allow_html=True)
 
-    # Render existing messages
-    for msg in st.session_state.messages:
+    # Render existing messages — only the newest window; full history stays in session state
+    messages = st.session_state.messages
+    hidden = len(messages) - st.session_state.message_window
+    if hidden > 0:
+        if st.button(f"Load earlier messages ({hidden} hidden)", key="load_earlier"):
+            st.session_state.message_window += MESSAGE_WINDOW
+            st.rerun()
+    for msg in messages[max(hidden, 0):]:
         if msg["role"] == "agent":
             # Show collapsed thinking steps if available
             if msg.get("steps"):
@@ -359,9 +405,7 @@ else:
         last_user_msg = st.session_state.messages[-1]["content"]
 
         try:
-            result, steps = asyncio.run(
-                run_workflow_streaming(last_user_msg, progress_area)
-            )
+            result, steps = run_workflow(last_user_msg, progress_area)
             progress_area.empty()
 
             response = get_agent_response(result)
@@ -384,6 +428,7 @@ else:
                 "doc_index_id": result.get("doc_index_id"),
                 "research_summary": result.get("research_summary"),
                 "final_markdown": result.get("final_markdown"),
+                "final_markdown_preview": result.get("final_markdown_preview"),
                 "metadata": result.get("metadata", {}),
                 "session_mode": result.get("session_mode"),
             }
@@ -398,6 +443,7 @@ else:
                 "steps": [],
             })
 
+        save_session()
         st.session_state.processing = False
         st.rerun()
 
@@ -1,6 +1,9 @@
+from langfuse import Langfuse
 from langfuse.langchain import CallbackHandler
 from config.logger import setup_logger
+from typing import Optional
 import os
+import zlib
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,32 +14,53 @@ logger = setup_logger(__name__)
 langfuse_secret = os.getenv("LANGFUSE_SECRET_KEY")
 langfuse_public = os.getenv("LANGFUSE_PUBLIC_KEY")
 langfuse_host = os.getenv("LANGFUSE_BASE_URL", "https://cloud.langfuse.com")
+# Fraction of sessions to trace (0.0 - 1.0)
+langfuse_sample_rate = float(os.getenv("LANGFUSE_SAMPLE_RATE", "1.0"))
+# Spans are buffered and sent in batches of flush_at, or every flush_interval seconds.
+# Anything still buffered is lost if the process dies without a flush — the SDK flushes
+# on normal interpreter exit, and app.py flushes explicitly when a run fails.
+langfuse_flush_at = int(os.getenv("LANGFUSE_FLUSH_AT", "512"))
+langfuse_flush_interval = float(os.getenv("LANGFUSE_FLUSH_INTERVAL", "5"))
 
 if not langfuse_secret or not langfuse_public:
     logger.warning(
         "Langfuse credentials not found. Traces will NOT be sent. "
         "Add LANGFUSE_SECRET_KEY and LANGFUSE_PUBLIC_KEY to your .env file."
     )
+    langfuse_client = None
     langfuse_handler = None
 else:
     try:
+        # Configure the shared client first; CallbackHandler picks it up via get_client()
+        langfuse_client = Langfuse(flush_at=langfuse_flush_at, flush_interval=langfuse_flush_interval)
         langfuse_handler = CallbackHandler()
         logger.info(f"Langfuse initialized. Sending traces to: {langfuse_host}")
     except Exception as e:
         logger.error(f"Failed to initialize Langfuse: {e}")
+        langfuse_client = None
         langfuse_handler = None
 
-def get_langfuse_config() -> dict:
-    """Return LangChain config dict with Langfuse callbacks for tracing."""
-    if langfuse_handler:
+def _is_sampled(session_id: Optional[str]) -> bool:
+    """Deterministic per-session sampling: the same session id always gets the same decision."""
+    if langfuse_sample_rate >= 1.0 or session_id is None:
+        return True
+    # crc32 rather than hash(): str hashes are salted per process, so decisions wouldn't be stable
+    return zlib.crc32(session_id.encode("utf-8")) / 2**32 < langfuse_sample_rate
+
+def get_langfuse_config(session_id: Optional[str] = None) -> dict:
+    """Return LangChain config dict with Langfuse callbacks for tracing.
+
+    When LANGFUSE_SAMPLE_RATE < 1, only a stable fraction of sessions is traced.
+    """
+    if langfuse_handler and _is_sampled(session_id):
         return {"callbacks": [langfuse_handler]}
     return {}
 
 def flush_langfuse_traces():
     """Force flush all pending traces to Langfuse. Call this before the app exits or on errors."""
-    if langfuse_handler:
+    if langfuse_client:
         try:
-            langfuse_handler.flush()
+            langfuse_client.flush()
             logger.info("Langfuse traces flushed")
         except Exception as e:
             logger.warning(f"Failed to flush Langfuse traces: {e}")
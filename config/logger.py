@@ -1,22 +1,44 @@
-
+import atexit
 import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Stateless, so a single instance is shared by every log file handler
+_FORMATTER = logging.Formatter('%(asctime)s | %(name)s | %(levelname)s | %(message)s')
+
+# One background writer per log file: log calls only enqueue the record and the
+# listener thread does the disk I/O, so logging never blocks the event loop.
+_queue_handlers = {}
+_queue_handlers_lock = threading.Lock()
+
+def _get_queue_handler(log_file: str) -> QueueHandler:
+    with _queue_handlers_lock:
+        handler = _queue_handlers.get(log_file)
+        if handler is None:
+            log_queue = queue.Queue(-1)
+            file_handler = logging.FileHandler(log_file)
+            file_handler.setFormatter(_FORMATTER)
+            listener = QueueListener(log_queue, file_handler)
+            listener.start()
+            # Drains anything still queued before the process exits
+            atexit.register(listener.stop)
+            handler = QueueHandler(log_queue)
+            _queue_handlers[log_file] = handler
+        return handler
 
 def setup_logger(name: str, log_file: str = "devagent.log", level=logging.INFO):
     """Function to setup a logger; can be called from different modules"""
-    
-    formatter = logging.Formatter('%(asctime)s | %(name)s | %(levelname)s | %(message)s')
-    
+
+    logger = logging.getLogger(name)
+    # Already configured: return it before building or opening anything
+    if logger.handlers:
+        return logger
+
     # Ensure log directory exists if needed, for now just root folder as per plan
     # If the user wants specific folder, they can specify path in log_file
-    
-    handler = logging.FileHandler(log_file)        
-    handler.setFormatter(formatter)
 
-    logger = logging.getLogger(name)
     logger.setLevel(level)
-    
-    # Avoid adding multiple handlers if logger is already configured
-    if not logger.handlers:
-        logger.addHandler(handler)
+    logger.addHandler(_get_queue_handler(log_file))
 
     return logger
@@ -1,16 +1,80 @@
-from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.rate_limiters import BaseRateLimiter
 from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 from dotenv import load_dotenv
+import asyncio
 import os
+import threading
+import time
 
 load_dotenv()
 
 mega_api_key = os.getenv("MEGALLM_API_KEY")
 
-rate_limiter = InMemoryRateLimiter(
+
+class TokenBucketRateLimiter(BaseRateLimiter):
+    """Token bucket that sleeps exactly until the caller's token is due.
+
+    InMemoryRateLimiter re-checks the bucket every `check_every_n_seconds`; here each
+    caller reserves a token up front (going into debt if the bucket is empty) and then
+    sleeps once for the computed wait, so queued callers are served in order.
+    """
+
+    def __init__(self, requests_per_second: float, max_bucket_size: float = 1):
+        self.requests_per_second = requests_per_second
+        self.max_bucket_size = max_bucket_size
+        self._tokens = max_bucket_size
+        self._last_refill = time.monotonic()
+        # threading.Lock: sync and async callers share the bucket and never await while holding it
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_bucket_size, self._tokens + (now - self._last_refill) * self.requests_per_second)
+        self._last_refill = now
+
+    def _try_take(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _reserve(self) -> float:
+        """Take a token, on credit if needed, and return the seconds until it is valid."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.requests_per_second)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self._try_take()
+        time.sleep(self._reserve())
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self._try_take()
+        await asyncio.sleep(self._reserve())
+        return True
+
+    async def await_token(self) -> float:
+        """Wait for a token like aacquire and return the seconds spent waiting."""
+        wait = self._reserve()
+        await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Make the next token due no sooner than `seconds` from now, holding back every caller."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 1 - seconds * self.requests_per_second)
+
+
+rate_limiter = TokenBucketRateLimiter(
     requests_per_second=0.25,
-    check_every_n_seconds=0.1,
     max_bucket_size=1
 )
 
@@ -17,6 +17,7 @@ class AgentState(TypedDict):
     docs_url: Optional[str]
     doc_content:Optional[str]
     doc_index_id: Optional[str]
+    prefetched_doc: Optional[Dict[str, Any]]  # Scrape preview of docs_url taken by version_agent
 
     # Github code
     github_repos: List[Dict[str, str]]
@@ -27,10 +28,12 @@ class AgentState(TypedDict):
 
     # Agent output
     research_summary: Optional[str]
+    intro_draft: Optional[str]  # Introduction + Installation drafted during indexing
     tutorial_draft: Optional[str]
     critique_feedback: Optional[str]
 
     # Critique validation
+    validation_context: Optional[str]  # Index excerpts pre-fetched by writer_agent for the critique
     validation_passed: Optional[bool]
     issues_found: List[str]
     next_action: Optional[Literal['approve', 'revise']]
@@ -44,6 +47,7 @@ class AgentState(TypedDict):
 
     #Final output
     final_markdown: Optional[str]
+    final_markdown_preview: Optional[str]  # First 1000 chars, shown to chat_agent every turn
     metadata: Dict[str, Any]
 
     # Chat / session
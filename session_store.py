@@ -0,0 +1,43 @@
+"""
+SQLite-backed chat session store.
+Keeps each session's messages and last workflow result outside the Streamlit process,
+so a conversation survives server restarts and browser refreshes.
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class SessionStore:
+    """Small key/value store of session_id -> JSON state."""
+
+    def __init__(self, path: str = ".data/sessions.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: Streamlit serves sessions from several threads
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored state for a session, or None if it has none yet."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, state: Dict[str, Any]) -> None:
+        """Insert or replace the stored state for a session."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state, default=str), time.time()),
+            )
@@ -0,0 +1,78 @@
+import ast
+import re
+from typing import List, Optional
+from config.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# ```lang\n ... \n``` fenced blocks; the info string may carry extra words (```python title="x")
+FENCE_RE = re.compile(r"^(`{3,}|~{3,})[ \t]*([\w+-]*)[^\n]*\n(.*?)^\1[ \t]*$", re.MULTILINE | re.DOTALL)
+
+PYTHON_FENCES = {"python", "py", "python3"}
+JS_FENCES = {"javascript", "js", "jsx", "mjs", "node"}
+
+_js_parser = None
+_js_parser_loaded = False
+
+
+def _get_js_parser():
+    """Load the tree-sitter JavaScript parser once; None if tree-sitter is unavailable."""
+    global _js_parser, _js_parser_loaded
+    if not _js_parser_loaded:
+        _js_parser_loaded = True
+        try:
+            from tree_sitter_language_pack import get_parser
+            _js_parser = get_parser("javascript")
+        except Exception as e:
+            logger.warning(f"tree-sitter JavaScript parser unavailable, skipping JS syntax checks: {e}")
+    return _js_parser
+
+
+def _check_python(code: str) -> Optional[str]:
+    # REPL transcripts (>>> prompts mixed with output) aren't meant to parse as a module
+    if any(line.lstrip().startswith(">>>") for line in code.splitlines()):
+        return None
+    try:
+        # Async-library tutorials commonly use top-level await, as in a notebook or asyncio REPL
+        compile(code, "<tutorial>", "exec",
+                flags=ast.PyCF_ONLY_AST | ast.PyCF_ALLOW_TOP_LEVEL_AWAIT, dont_inherit=True)
+        return None
+    except SyntaxError as e:
+        return f"line {e.lineno}: {e.msg}"
+
+
+def _check_javascript(code: str) -> Optional[str]:
+    parser = _get_js_parser()
+    if parser is None:
+        return None
+    root = parser.parse(code.encode("utf-8")).root_node
+    if not root.has_error:
+        return None
+    # Report the first ERROR / missing node so the reviewer knows where to look
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.type == "ERROR" or node.is_missing:
+            return f"line {node.start_point[0] + 1}: syntax error near '{node.text.decode('utf-8', 'replace')[:40]}'"
+        stack.extend(reversed(node.children))
+    return "syntax error"
+
+
+def find_code_block_errors(markdown: str) -> List[str]:
+    """Statically check fenced Python/JavaScript blocks in a tutorial and list syntax errors.
+
+    Only syntax is checked here; semantics (deprecated APIs, version fit) are left to the critique LLM.
+    """
+    errors = []
+    for index, match in enumerate(FENCE_RE.finditer(markdown), start=1):
+        lang = match.group(2).lower()
+        code = match.group(3)
+        if lang in PYTHON_FENCES:
+            error = _check_python(code)
+        elif lang in JS_FENCES:
+            error = _check_javascript(code)
+        else:
+            continue
+        if error:
+            errors.append(f"Code block {index} ({lang}): {error}")
+    return errors
@@ -1,23 +1,46 @@
 from langchain_core.tools import tool
 from llama_index.readers.web import TrafilaturaWebReader
-from typing import Dict
+from typing import Dict, List
 from bs4 import BeautifulSoup
-import httpx
 import asyncio
+import time
+from collections import OrderedDict
 from urllib.parse import urljoin, urlparse
 from config.logger import setup_logger
+from tools.http_client import get_http_client
 
 logger = setup_logger(__name__)
 
 
-@tool
-async def scrape_documentation(url: str) -> Dict :
-    """Scrape a documentation webpage and extract clean text content using TrafilaturaWebReader.
-    Args: 
-        url(str): The URL of the documentation page to scrape.
-    Returns:
-        Dict: A dictionary containing the scraped content and metadata(url, success status, error if any).
-    """
+MAX_PREVIEW = 3000
+MAX_CONCURRENT_SCRAPES = 8
+# Docs pages rarely change, so follow-up runs in a session reuse recent scrapes
+SCRAPE_CACHE_TTL = 3600
+SCRAPE_CACHE_SIZE = 128
+# Links inside navigation areas, matched in a single pass over the document
+NAV_LINK_SELECTOR = "nav a[href], aside a[href], .sidebar a[href], .toc a[href], .navigation a[href]"
+
+_scrape_cache = OrderedDict()  # url -> (fetched_at, result), oldest first
+
+
+async def _scrape_one(url: str) -> Dict:
+    """Scrape a single page and return a preview — full content is indexed separately outside the agent."""
+    cached = _scrape_cache.get(url)
+    if cached and time.monotonic() - cached[0] < SCRAPE_CACHE_TTL:
+        _scrape_cache.move_to_end(url)
+        return dict(cached[1])
+
+    result = await _fetch_preview(url)
+    # Only successful scrapes are cached so transient failures get retried
+    if result["success"]:
+        _scrape_cache[url] = (time.monotonic(), result)
+        _scrape_cache.move_to_end(url)
+        while len(_scrape_cache) > SCRAPE_CACHE_SIZE:
+            _scrape_cache.popitem(last=False)
+    return dict(result)
+
+
+async def _fetch_preview(url: str) -> Dict:
     reader = TrafilaturaWebReader()
     try:
         documents = await asyncio.to_thread(reader.load_data, [url])
@@ -25,8 +48,6 @@ async def scrape_documentation(url: str) -> Dict :
             return {"url": url, "success": False, "error": "No content extracted from the page."}
         doc = documents[0]
         full_text = doc.text
-        # Return only a preview — full content is indexed separately outside the agent
-        MAX_PREVIEW = 3000
         return {
             "url": url,
             "success": True,
@@ -36,6 +57,34 @@ async def scrape_documentation(url: str) -> Dict :
         }
     except Exception as e:
         return {"url": url, "success": False, "error": str(e)}
+
+
+@tool
+async def scrape_documentation(url: str) -> Dict :
+    """Scrape a documentation webpage and extract clean text content using TrafilaturaWebReader.
+    Args: 
+        url(str): The URL of the documentation page to scrape.
+    Returns:
+        Dict: A dictionary containing the scraped content and metadata(url, success status, error if any).
+    """
+    return await _scrape_one(url)
+
+
+@tool
+async def scrape_documentation_batch(urls: List[str]) -> List[Dict]:
+    """Scrape several documentation webpages concurrently. Prefer this over calling scrape_documentation in a loop.
+    Args:
+        urls(List[str]): The URLs of the documentation pages to scrape.
+    Returns:
+        List[Dict]: One result per URL, in the same order, each shaped like scrape_documentation's result.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+
+    async def _bounded_scrape(url: str) -> Dict:
+        async with semaphore:
+            return await _scrape_one(url)
+
+    return list(await asyncio.gather(*[_bounded_scrape(url) for url in urls]))
     
 
 @tool
@@ -47,21 +96,17 @@ async def discover_doc_navigation_links(url:str)-> Dict:
         Dictionary with the list of internal documentation links found.
     """
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(url)
-            response.raise_for_status()
+        response = await get_http_client().get(url)
+        response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(response.text, 'lxml')
         base_domain = urlparse(url).netloc
 
-        nav_areas = soup.find_all(['nav', 'aside']) + soup.find_all(class_ = ['sidebar','toc','navigation'])
         doc_links = set()
-        for area in nav_areas:
-            for link in area.find_all('a', href=True):
-                href = str(link['href']) 
-                full_url = urljoin(url, href)
-                if urlparse(full_url).netloc == base_domain:
-                    doc_links.add(full_url)
+        for link in soup.select(NAV_LINK_SELECTOR):
+            full_url = urljoin(url, str(link['href']))
+            if urlparse(full_url).netloc == base_domain:
+                doc_links.add(full_url)
         
         return {
             "success": True,
@@ -71,5 +116,20 @@ async def discover_doc_navigation_links(url:str)-> Dict:
         }
     except Exception as e:
         return {"success": False, "base_url": url, "error": str(e)}
+
+
+@tool
+async def scrape_and_discover(url: str) -> Dict:
+    """Scrape a documentation page AND discover its internal navigation links in one call (both run concurrently).
+    Args:
+        url(str): The URL of the base documentation page.
+    Returns:
+        Dict with "page" (shaped like scrape_documentation's result) and "navigation" (shaped like discover_doc_navigation_links' result).
+    """
+    page, navigation = await asyncio.gather(
+        scrape_documentation.ainvoke({"url": url}),
+        discover_doc_navigation_links.ainvoke({"url": url}),
+    )
+    return {"page": page, "navigation": navigation}
     
     
\ No newline at end of file
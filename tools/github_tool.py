@@ -1,10 +1,17 @@
 import httpx
 import os
+import asyncio
 import base64
 import logging
 import ast
-from typing import List, Dict, Optional
+import re
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, List, Dict, Optional
+from urllib.parse import quote, urlencode
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 from config.logger import setup_logger
@@ -14,6 +21,45 @@ load_dotenv()
 # Configure logging
 logger = setup_logger(__name__)
 
+# Per-call cap on parallel file downloads, to stay clear of GitHub's secondary rate limits
+MAX_CONCURRENT_FILE_FETCHES = 5
+
+# Cap on in-flight GitHub requests across all callers of one GitHubTool
+MAX_CONCURRENT_REQUESTS = 8
+
+# Rate-limited requests are retried this many times, waiting at most MAX_RATE_LIMIT_WAIT
+# seconds each; a longer wait (e.g. an exhausted hourly quota) fails fast instead
+RATE_LIMIT_RETRIES = 3
+MAX_RATE_LIMIT_WAIT = 60.0
+
+# API responses are cached for CACHE_TTL seconds, then revalidated with their ETag
+CACHE_TTL = 300
+CACHE_MAX_ENTRIES = 256
+
+# Plain-text file contents served from GitHub's CDN
+RAW_CONTENT_URL = "https://raw.githubusercontent.com"
+
+# Files downloaded when candidates come from the repository tree rather than code search
+TREE_CANDIDATE_FILES = 20
+
+# JS line numbers count '\n' only, as they always have
+NEWLINE_RE = re.compile(r'\n')
+
+# Line terminators as Python's tokenizer counts them (so offsets agree with ast line numbers)
+LINE_BREAK_RE = re.compile(r'\r\n|\r|\n')
+
+
+@lru_cache(maxsize=128)
+def _js_usage_pattern(names: frozenset) -> re.Pattern:
+    """
+    Union pattern matching any library alias or imported symbol used in a JS body.
+    Word-bounded, and followed by a call or property access:
+        express.Router()  →  name.
+        Router()          →  name(
+    """
+    alternation = '|'.join(re.escape(name) for name in sorted(names))
+    return re.compile(rf'\b(?:{alternation})\s*[.(]')
+
 
 @dataclass
 class CodeSnippet:
@@ -47,12 +93,32 @@ class GitHubTool:
             '.github/', 'node_modules/', 'venv/', 'env/', 'dist/',
             '__pycache__/', 'build/'
         ]
+        # One case-insensitive alternation instead of a substring scan per excluded path
+        self._exclude_re = re.compile('|'.join(map(re.escape, self.exclude_paths)), re.IGNORECASE)
         
-        # Reusable client for connection pooling
-        self.client = httpx.AsyncClient(timeout=30.0, headers=self.headers)
+        # Reusable client for connection pooling. Limits go on the transport: a client-level
+        # `limits` is ignored once a custom transport is passed. Transport retries only cover
+        # failed connection attempts, so they never replay a request GitHub already received.
+        transport = httpx.AsyncHTTPTransport(
+            retries=2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0),
+        )
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            headers=self.headers,
+            transport=transport,
+        )
+
+        # key -> (expires_at, etag, json); insertion-ordered so the oldest entry is evicted first
+        self._response_cache: Dict[str, tuple] = {}
+        self._cache_locks: Dict[str, asyncio.Lock] = {}
+
+        self._sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        # Wall-clock time before which no request is sent (quota exhausted until reset)
+        self._paused_until = 0.0
     
     async def close(self):
-        """Close the httpx client."""
+        """Close the httpx client. The shared `github_tool` is closed once, at process shutdown."""
         if not self.client.is_closed:
             await self.client.aclose()
     
@@ -62,9 +128,121 @@ class GitHubTool:
     async def __aexit__(self, *args):
         await self.close()
 
+    async def _cached_get(self, url: str, params: Optional[Dict] = None, ttl: float = CACHE_TTL, as_text: bool = False) -> Any:
+        """
+        GET a GitHub URL and return the decoded JSON (or text), served from a TTL cache when fresh.
+        
+        Concurrent callers for the same request share one fetch. Expired entries are
+        revalidated with If-None-Match; a 304 reply doesn't count against the rate limit.
+        Raises httpx.HTTPStatusError like raise_for_status() on error responses.
+        """
+        key = f"{url}?{urlencode(sorted((params or {}).items()))}"
+        lock = self._cache_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                entry = self._response_cache.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[2]
+
+                headers = {'If-None-Match': entry[1]} if entry and entry[1] else None
+                response = await self._request(url, params=params, headers=headers)
+                if response.status_code == 304 and entry:
+                    data, etag = entry[2], entry[1]
+                else:
+                    response.raise_for_status()
+                    data = response.text if as_text else response.json()
+                    etag = response.headers.get('ETag')
+
+                self._response_cache.pop(key, None)
+                self._response_cache[key] = (time.monotonic() + ttl, etag, data)
+                while len(self._response_cache) > CACHE_MAX_ENTRIES:
+                    oldest = next(iter(self._response_cache))
+                    del self._response_cache[oldest]
+                    self._cache_locks.pop(oldest, None)
+                return data
+        finally:
+            # A lock is only kept alongside a cached entry, so keys whose fetch failed don't pile up
+            if key not in self._response_cache and self._cache_locks.get(key) is lock:
+                del self._cache_locks[key]
+
+    async def _request(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> httpx.Response:
+        """
+        Send one GET, bounded by the shared semaphore and paced by GitHub's rate-limit headers.
+        Rate-limited replies are retried after the wait GitHub asks for; anything else
+        (including the final rate-limited reply) is returned to the caller as-is.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            delay = self._paused_until - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            async with self._sem:
+                response = await self.client.get(url, params=params, headers=headers)
+
+            wait = self._rate_limit_wait(response, attempt)
+            if wait is None or attempt == RATE_LIMIT_RETRIES:
+                return response
+            logger.warning(f"GitHub rate limit hit ({response.status_code}), retrying in {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+    def _rate_limit_wait(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a rate-limited response, or None if it shouldn't be retried.
+        Also pauses later requests when the response says the quota is used up.
+        """
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        until_reset = None
+        if remaining == '0' and reset and reset.isdigit():
+            until_reset = max(int(reset) - time.time(), 0.0) + 1.0
+            if until_reset <= MAX_RATE_LIMIT_WAIT:
+                self._paused_until = max(self._paused_until, time.time() + until_reset)
+
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            wait = float(retry_after)
+        elif until_reset is not None:
+            wait = until_reset
+        elif response.status_code == 429:
+            wait = 2.0 ** attempt
+        else:
+            # Plain 403: a permissions problem, not a rate limit
+            return None
+        return wait if wait <= MAX_RATE_LIMIT_WAIT else None
+
+    # All JS import forms in one alternation; the module name is captured rather than baked
+    # into the pattern, so it is compiled once and reused for every file and library:
+    #   const x = require('lib')         → alias
+    #   import x from 'lib'              → alias (default import)
+    #   import * as x from 'lib'         → alias (namespace import)
+    #   import { a, b as c } from 'lib'  → named
+    JS_IMPORT_RE = re.compile(
+        r'(?:(?:const|let|var)\s+(?P<req_alias>\w+)\s*=\s*require\(\s*'
+        r'|import\s+(?:(?P<default_alias>\w+)|\*\s+as\s+(?P<ns_alias>\w+)|\{(?P<named>[^}]+)\})\s+from\s+)'
+        r'["\'](?P<lib>[^"\']+)["\']'
+    )
+
+    # Function declarations, arrow functions, async variants and class methods
+    JS_FUNCTION_RE = re.compile(
+        r'(?:export\s+)?(?:export\s+default\s+)?'   # optional export
+        r'(?:async\s+)?'                             # optional async
+        r'(?:'
+        r'function\s*\*?\s+(\w+)\s*\([^)]*\)'       # function name(...)
+        r'|'
+        r'(\w+)\s*=\s*(?:async\s+)?'                # const name = (async)?
+        r'(?:\([^)]*\)|(\w+))\s*=>'                 # (...) => or arg =>
+        r'|'
+        r'(?<![.\w])(\w+)\s*\([^)]*\)\s*(?=\{)'     # method(...)  — no dot/word before it
+        r')\s*\{',
+        re.MULTILINE
+    )
+
     def _should_exclude_path(self, path: str) -> bool:
         """Check if a file path should be excluded."""
-        return any(excluded in path.lower() for excluded in self.exclude_paths)
+        return self._exclude_re.search(path) is not None
 
     async def search_repos(
         self,
@@ -97,9 +275,7 @@ class GitHubTool:
         }
 
         try:
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._cached_get(url, params=params)
 
             repos = [
                 {
@@ -130,7 +306,8 @@ class GitHubTool:
         repo_name: str,
         library_name: str,
         language: str,
-        max_files: int = 10
+        max_files: int = 10,
+        default_branch: Optional[str] = None
     ) -> List[Dict]:
         """
         Get file contents from a repository that import/use the specified library.
@@ -140,6 +317,10 @@ class GitHubTool:
             library_name: Name of the library to search for
             language: Programming language (python or javascript)
             max_files: Maximum number of files to retrieve
+            default_branch: Branch to read raw file contents from; when omitted,
+                contents are fetched (base64 encoded) through the Contents API.
+                Also enables falling back to a Trees API listing when code search
+                is rate limited or finds nothing.
             
         Returns:
             List of file content dictionaries
@@ -149,8 +330,10 @@ class GitHubTool:
         # Build search query based on language
         if language.lower() == 'python':
             code_query = f"import {library_name} OR from {library_name} repo:{repo_name} extension:py"
+            extension = '.py'
         elif language.lower() == 'javascript':
             code_query = f"require('{library_name}') OR import {library_name} repo:{repo_name} extension:js"
+            extension = '.js'
         else:
             logger.error(f"Unsupported language: {language}")
             return []
@@ -159,40 +342,64 @@ class GitHubTool:
         params = {'q': code_query, 'per_page': max_files}
 
         try:
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
-            code_files = response.json().get('items', [])
-
-            # Filter out excluded paths
-            code_files = [
-                f for f in code_files 
-                if not self._should_exclude_path(f['path'])
-            ]
+            try:
+                code_files = (await self._cached_get(url, params=params)).get('items', [])
+            except httpx.HTTPStatusError as e:
+                # Code search has its own 30 req/min quota; the tree listing below does not
+                if not default_branch:
+                    raise
+                logger.warning(f"Code search failed ({e.response.status_code}), listing the repository tree instead")
+                code_files = []
+
+            # Filter out excluded paths, stopping once max_files are kept
+            code_files = list(islice(
+                (f for f in code_files if not self._should_exclude_path(f['path'])),
+                max_files
+            ))
+
+            # Files found through the tree are unverified, so fetch a wider set and keep
+            # only those that mention the library
+            from_tree = not code_files and bool(default_branch)
+            if from_tree:
+                code_files = await self._list_tree(repo_name, default_branch, extension)
+                # Paths naming the library (e.g. utils/pandas_io.py) are the likeliest users
+                code_files.sort(key=lambda f: library_name not in f['path'])
+                logger.info(f"Found {len(code_files)} {extension} files in the {repo_name} tree")
+
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILE_FETCHES)
+
+            async def _fetch_one(file: Dict) -> str:
+                async with semaphore:
+                    if default_branch:
+                        # Plain text from the CDN: no JSON envelope and no base64 to decode
+                        raw_url = f"{RAW_CONTENT_URL}/{repo_name}/{default_branch}/{quote(file['path'])}"
+                        return await self._cached_get(raw_url, as_text=True)
+                    file_data = await self._cached_get(file['url'])
+                return base64.b64decode(file_data['content']).decode('utf-8', errors='ignore')
+
+            # Fetch file contents concurrently instead of one round-trip after another
+            targets = code_files[:TREE_CANDIDATE_FILES if from_tree else max_files]
+            results = await asyncio.gather(*[_fetch_one(f) for f in targets], return_exceptions=True)
 
             files_content = []
-            for file in code_files[:max_files]:
-                try:
-                    # Fetch file content
-                    file_response = await self.client.get(file['url'])
-                    file_response.raise_for_status()
-                    file_data = file_response.json()
-
-                    # Decode base64 content
-                    content = base64.b64decode(file_data['content']).decode('utf-8', errors='ignore')
-
-                    files_content.append({
-                        'content': content,
-                        'path': file['path'],
-                        'repo': repo_name,
-                        'url': file['html_url'],
-                        'size': file_data.get('size', 0)
-                    })
-                    
-                    logger.info(f"Retrieved file: {file['path']}")
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to fetch file {file['path']}: {str(e)}")
+            for file, content in zip(targets, results):
+                if isinstance(content, Exception):
+                    logger.warning(f"Failed to fetch file {file['path']}: {str(content)}")
                     continue
+                if from_tree and library_name not in content:
+                    continue
+                if len(files_content) >= max_files:
+                    break
+
+                files_content.append({
+                    'content': content,
+                    'path': file['path'],
+                    'repo': repo_name,
+                    'url': file['html_url'],
+                    'size': len(content)
+                })
+
+                logger.info(f"Retrieved file: {file['path']}")
 
             logger.info(f"Retrieved {len(files_content)} files from {repo_name}")
             return files_content
@@ -204,6 +411,27 @@ class GitHubTool:
             logger.error(f"Error fetching files: {str(e)}")
             return []
 
+    async def _list_tree(self, repo_name: str, branch: str, extension: str) -> List[Dict]:
+        """
+        List every non-excluded file with the given extension in one recursive
+        Trees API call, shaped like code search items (path, html_url).
+        """
+        url = f"https://api.github.com/repos/{repo_name}/git/trees/{quote(branch, safe='')}"
+        data = await self._cached_get(url, params={'recursive': '1'})
+        if data.get('truncated'):
+            logger.warning(f"Tree listing for {repo_name} was truncated by GitHub")
+
+        return [
+            {
+                'path': item['path'],
+                'html_url': f"https://github.com/{repo_name}/blob/{branch}/{quote(item['path'])}"
+            }
+            for item in data.get('tree', [])
+            if item.get('type') == 'blob'
+            and item['path'].endswith(extension)
+            and not self._should_exclude_path(item['path'])
+        ]
+
     def _extract_python_functions(
         self,
         code: str,
@@ -224,9 +452,13 @@ class GitHubTool:
         """
         snippets = []
 
+        # Every alias or symbol we look for comes from text containing the library name,
+        # so without it there is nothing to find — skip building the AST at all
+        if library_name not in code:
+            return snippets
+
         try:
             tree = ast.parse(code)
-            lines = code.splitlines()
 
             # ----------------------------------------------------------
             # PASS 1: Collect library aliases & imported symbols
@@ -263,57 +495,67 @@ class GitHubTool:
             relevant_nodes: list = []
 
             class LibraryUsageVisitor(ast.NodeVisitor):
-                def visit_FunctionDef(self, node):
-                    if self._uses_library(node):
-                        relevant_nodes.append(node)
-                    self.generic_visit(node)
-
-                def visit_AsyncFunctionDef(self, node):
-                    if self._uses_library(node):
-                        relevant_nodes.append(node)
-                    self.generic_visit(node)
-
-                def visit_ClassDef(self, node):
-                    if self._uses_library(node):
-                        relevant_nodes.append(node)
-                    self.generic_visit(node)
-
-                def _uses_library(self, node) -> bool:
-                    for child in ast.walk(node):
-                        # Catches: pd.DataFrame(), pd.read_csv(), etc.
-                        if isinstance(child, ast.Attribute):
-                            if isinstance(child.value, ast.Name):
-                                if child.value.id in library_aliases:
-                                    return True
-                        # Catches: read_csv(), DataFrame(), etc.
-                        if isinstance(child, ast.Name):
-                            if child.id in imported_symbols:
-                                return True
-                    return False
+                """
+                Single bottom-up pass: every visit returns whether its subtree uses the
+                library, so a def/class knows its answer from its children's results
+                instead of re-walking its whole body (which made nested defs O(depth * n)).
+                """
+
+                def generic_visit(self, node) -> bool:
+                    used = False
+                    for child in ast.iter_child_nodes(node):
+                        # No short-circuit: nested defs still need to be visited and recorded
+                        if self.visit(child):
+                            used = True
+                    return used
+
+                def _visit_scope(self, node) -> bool:
+                    position = len(relevant_nodes)
+                    used = self.generic_visit(node)
+                    if used:
+                        # Insert ahead of any matched children to keep parent-first order
+                        relevant_nodes.insert(position, node)
+                    return used
+
+                visit_FunctionDef = _visit_scope
+                visit_AsyncFunctionDef = _visit_scope
+
+                def visit_ClassDef(self, node) -> bool:
+                    position = len(relevant_nodes)
+                    used = self.generic_visit(node)
+                    if used:
+                        # Everything recorded since `position` lies inside this class. Its
+                        # methods ship with the class source, so keep only nested classes.
+                        relevant_nodes[position:] = [
+                            n for n in relevant_nodes[position:] if isinstance(n, ast.ClassDef)
+                        ]
+                        relevant_nodes.insert(position, node)
+                    return used
+
+                def visit_Attribute(self, node) -> bool:
+                    # Catches: pd.DataFrame(), pd.read_csv(), etc.
+                    used = isinstance(node.value, ast.Name) and node.value.id in library_aliases
+                    return self.generic_visit(node) or used
+
+                def visit_Name(self, node) -> bool:
+                    # Catches: read_csv(), DataFrame(), etc.
+                    return node.id in imported_symbols
 
             LibraryUsageVisitor().visit(tree)
 
-            # ----------------------------------------------------------
-            # Deduplicate: skip methods already inside a matched class
-            # ----------------------------------------------------------
-            covered_ranges: list = []
-            for node in relevant_nodes:
-                if isinstance(node, ast.ClassDef):
-                    covered_ranges.append((node.lineno, node.end_lineno))
-
-            relevant_nodes = [
-                node for node in relevant_nodes
-                if isinstance(node, ast.ClassDef)
-                or not any(start <= node.lineno and node.end_lineno <= end for start, end in covered_ranges)
-            ]
-
             # ----------------------------------------------------------
             # Extract source code blocks from matched nodes
             # ----------------------------------------------------------
+            # (start, end) offsets of every line break, counted the way the parser counts
+            # lines, so a node's source is one slice of `code` rather than a join of split lines
+            line_breaks = [m.span() for m in LINE_BREAK_RE.finditer(code)] if relevant_nodes else []
+
             for node in relevant_nodes:
                 start = node.lineno - 1
                 end = node.end_lineno
-                function_code = '\n'.join(lines[start:end])
+                first = line_breaks[start - 1][1] if start else 0
+                last = line_breaks[end - 1][0] if end <= len(line_breaks) else len(code)
+                function_code = code[first:last]
 
                 snippets.append(CodeSnippet(
                     code=function_code,
@@ -351,51 +593,35 @@ class GitHubTool:
                         `import { read_csv as rc } from 'pandas'` → symbols = {"rc"}
           Pass 2 → Find functions whose body references those aliases or symbols.
         """
-        import re
         snippets = []
 
+        # No import/require can name the library without the name appearing in the source
+        if library_name not in code:
+            return snippets
+
         try:
             # ----------------------------------------------------------
             # PASS 1: Collect library aliases & imported symbols
             # ----------------------------------------------------------
             library_aliases: set = set()
             imported_symbols: set = set()
-            escaped = re.escape(library_name)
-
-            # const x = require('library') / let x = require("library")
-            for match in re.finditer(
-                rf'(?:const|let|var)\s+(\w+)\s*=\s*require\(\s*["\']' + escaped + r'["\']\s*\)',
-                code
-            ):
-                library_aliases.add(match.group(1))
-
-            # import x from 'library'  (default import)
-            for match in re.finditer(
-                rf'import\s+(\w+)\s+from\s+["\']' + escaped + r'["\']',
-                code
-            ):
-                library_aliases.add(match.group(1))
-
-            # import { a, b as c } from 'library'  (named imports, with optional aliases)
-            named_block = re.search(
-                rf'import\s+\{{([^}}]+)\}}\s+from\s+["\']' + escaped + r'["\']',
-                code
-            )
-            if named_block:
-                for item in named_block.group(1).split(','):
-                    item = item.strip()
-                    if not item:
-                        continue
-                    # `a as b` → use "b", otherwise use the name directly
-                    parts = item.split(' as ')
-                    imported_symbols.add(parts[-1].strip())
-
-            # import * as x from 'library'  (namespace import)
-            for match in re.finditer(
-                rf'import\s+\*\s+as\s+(\w+)\s+from\s+["\']' + escaped + r'["\']',
-                code
-            ):
-                library_aliases.add(match.group(1))
+
+            # One sweep over the file for every import form; keep those naming this library
+            for match in self.JS_IMPORT_RE.finditer(code):
+                if match.group('lib') != library_name:
+                    continue
+                if match.group('named') is not None:
+                    for item in match.group('named').split(','):
+                        item = item.strip()
+                        if not item:
+                            continue
+                        # `a as b` → use "b", otherwise use the name directly
+                        parts = item.split(' as ')
+                        imported_symbols.add(parts[-1].strip())
+                else:
+                    library_aliases.add(
+                        match.group('req_alias') or match.group('default_alias') or match.group('ns_alias')
+                    )
 
             logger.debug(f"Aliases: {library_aliases}, Symbols: {imported_symbols}")
 
@@ -406,24 +632,13 @@ class GitHubTool:
             # ----------------------------------------------------------
             # PASS 2: Find functions that use the library
             # ----------------------------------------------------------
-            # Pattern captures: function declarations, arrow functions, async variants, class methods
-            function_pattern = re.compile(
-                r'(?:export\s+)?(?:export\s+default\s+)?'   # optional export
-                r'(?:async\s+)?'                             # optional async
-                r'(?:'
-                r'function\s*\*?\s+(\w+)\s*\([^)]*\)'       # function name(...)
-                r'|'
-                r'(\w+)\s*=\s*(?:async\s+)?'                # const name = (async)?
-                r'(?:\([^)]*\)|(\w+))\s*=>'                 # (...) => or arg =>
-                r'|'
-                r'(?<![.\w])(\w+)\s*\([^)]*\)\s*(?=\{)'     # method(...)  — no dot/word before it
-                r')\s*\{',
-                re.MULTILINE
-            )
-
-            lines = code.splitlines()
-
-            for match in function_pattern.finditer(code):
+            # Aliases and symbols share one body pattern, compiled once per import set
+            usage_pattern = _js_usage_pattern(frozenset(library_aliases | imported_symbols))
+
+            # Offsets of every '\n', built on the first match; line numbers become a bisect
+            newlines = None
+
+            for match in self.JS_FUNCTION_RE.finditer(code):
                 # Resolve function name from whichever capture group matched
                 function_name = match.group(1) or match.group(2) or match.group(4) or 'anonymous'
                 body_start = match.end() - 1  # position of the opening '{'
@@ -436,12 +651,14 @@ class GitHubTool:
                 function_code = code[match.start():body_end + 1]
 
                 # Check if the function body actually uses any alias or symbol
-                if not self._js_body_uses_library(function_code, library_aliases, imported_symbols):
+                if not usage_pattern.search(function_code):
                     continue
 
                 # Calculate line numbers
-                line_start = code[:match.start()].count('\n') + 1
-                line_end = line_start + function_code.count('\n')
+                if newlines is None:
+                    newlines = [m.start() for m in NEWLINE_RE.finditer(code)]
+                line_start = bisect_left(newlines, match.start()) + 1
+                line_end = bisect_right(newlines, body_end) + 1
 
                 snippets.append(CodeSnippet(
                     code=function_code,
@@ -462,37 +679,24 @@ class GitHubTool:
     @staticmethod
     def _find_closing_brace(code: str, open_pos: int) -> int:
         """Find the matching closing brace for an opening brace at open_pos."""
+        # Jump between braces with str.find so the Python loop runs once per brace,
+        # not once per character
         depth = 0
-        for i in range(open_pos, len(code)):
-            if code[i] == '{':
+        i = open_pos
+        next_open = code.find('{', i)
+        while True:
+            next_close = code.find('}', i)
+            if next_close == -1:
+                return -1  # no matching brace found
+            if next_open != -1 and next_open < next_close:
                 depth += 1
-            elif code[i] == '}':
+                i = next_open + 1
+                next_open = code.find('{', i)
+            else:
                 depth -= 1
                 if depth == 0:
-                    return i
-        return -1  # no matching brace found
-
-    @staticmethod
-    def _js_body_uses_library(body: str, aliases: set, symbols: set) -> bool:
-        """
-        Check if a JS function body references any library alias or imported symbol.
-        Uses word-boundary regex to avoid partial matches.
-        
-        Aliases match both dot access and direct calls:
-            express.Router()  →  alias.
-            express()         →  alias(
-        Symbols match calls and property access:
-            Router()          →  symbol(
-            Router.use()      →  symbol.
-        """
-        import re
-        for name in aliases:
-            if re.search(rf'\b{re.escape(name)}\s*[.(]', body):
-                return True
-        for name in symbols:
-            if re.search(rf'\b{re.escape(name)}\s*[.(]', body):
-                return True
-        return False
+                    return next_close
+                i = next_close + 1
 
     def extract_function_snippets(
         self,
@@ -550,7 +754,7 @@ class GitHubTool:
 # Example usage for LangGraph integration
 async def main():
     """Example usage of the GitHub tool."""
-    tool = GitHubTool()
+    tool = github_tool
     
     library_name = "pandas"
     language = "python"
@@ -577,6 +781,11 @@ async def main():
                 logger.info(f"Lines: {snippet['line_start']}-{snippet['line_end']}")
                 logger.info(f"Code:\n{snippet['code']}")
 
+    await tool.close()
+
+# Shared for the whole process so every github_search call reuses one connection pool
+# (and one response cache) instead of paying a fresh TCP+TLS handshake per instance.
+# Import this rather than constructing a GitHubTool; app.py closes it on shutdown.
 github_tool = GitHubTool()
 @tool
 async def github_search(library_name: str, language: str) -> List[Dict]:
@@ -590,16 +799,18 @@ async def github_search(library_name: str, language: str) -> List[Dict]:
     if not repos:
         return []
     
-    all_snippets = []
-    for repo in repos:
-        files = await github_tool.get_library_files(repo['name'], library_name, language, max_files=3)
-        snippets = github_tool.extract_function_snippets(files, library_name, language)
-        all_snippets.extend(snippets)
-    
-    return all_snippets
+    async def _process(repo: Dict) -> List[Dict]:
+        files = await github_tool.get_library_files(
+            repo['name'], library_name, language, max_files=3, default_branch=repo.get('default_branch')
+        )
+        # AST parsing / regex extraction is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(github_tool.extract_function_snippets, files, library_name, language)
+
+    # Repos are independent, so their file fetches run concurrently
+    results = await asyncio.gather(*[_process(repo) for repo in repos])
+    return [snippet for snippets in results for snippet in snippets]
 
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
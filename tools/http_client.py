@@ -0,0 +1,38 @@
+import httpx
+import asyncio
+from typing import Optional
+from config.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Shared by the unauthenticated tools (doc scraping / link discovery) so the pages
+# fetched during one research turn reuse the same keep-alive connections.
+# GitHubTool keeps its own client so its auth token is never sent to other hosts.
+# keepalive_expiry is raised from httpx's 5s default: the agent often thinks for longer
+# than that between two requests to the same docs host.
+_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0)
+_TIMEOUT = httpx.Timeout(10.0)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it for the running event loop if needed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # A client's connection pool is tied to the loop it was opened on. app.py keeps one
+    # long-lived loop, but scripts using asyncio.run() get a fresh loop per call.
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(limits=_LIMITS, timeout=_TIMEOUT, follow_redirects=True)
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client. Call before the event loop that owns it shuts down."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
@@ -1,59 +1,384 @@
-from llama_index.core import VectorStoreIndex , Document , StorageContext
+from llama_index.core import VectorStoreIndex , Document , QueryBundle
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import BaseNode, MetadataMode
 from llama_index.core.vector_stores import MetadataFilters, MetadataFilter
-from llama_index.core.node_parser import SentenceSplitter, CodeSplitter
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
 from langchain_core.tools import tool
 import chromadb
-from typing import List, Dict, Optional
+from chromadb.api.shared_system_client import SharedSystemClient
+from typing import Iterator, List, Dict, Optional, Tuple
+from collections import OrderedDict
 from pathlib import Path
+from urllib.parse import urlparse
+from array import array
 from dotenv import load_dotenv
 import asyncio
+import functools
+import hashlib
+import json
 import os
+import sqlite3
+import threading
 import shutil
 import time
 
 
 load_dotenv()
 from config.logger import setup_logger
+from config.models import TokenBucketRateLimiter
+from tools.http_client import get_http_client
+from tools.node_parsing import split_documents
 
 logger = setup_logger(__name__)
 
+# Embedding requests in flight at once while building an index, and the most texts per request
+MAX_CONCURRENT_EMBED_BATCHES = 8
+EMBED_BATCH_SIZE = 20
+# Gemini rejects request payloads over 4 MiB; batches are packed to stay under this many text bytes
+EMBED_BATCH_MAX_BYTES = 3_800_000
+# Embedding requests per minute allowed by the Gemini API key's quota; requests are paced to it
+EMBED_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "300"))
+# Pause before the one extra attempt at a batch that failed past the model's own retries,
+# unless the error says how long to wait
+EMBED_RETRY_DELAY = 10.0
+# Index builds stream documents through parse -> embed -> write: documents are split in groups
+# of about STREAM_PARSE_CHARS of text, at most STREAM_QUEUE_SIZE split groups wait for embedding,
+# and nodes are embedded and written STREAM_FLUSH_NODES at a time
+STREAM_PARSE_CHARS = 2_000_000
+STREAM_QUEUE_SIZE = 32
+STREAM_FLUSH_NODES = MAX_CONCURRENT_EMBED_BATCHES * EMBED_BATCH_SIZE
+# An in-progress sidecar older than this is treated as left behind by a dead build,
+# whatever its owner pid says (the pid may have been reused)
+STALE_BUILD_SECONDS = 6 * 3600
+# Pages fetched at once by build_and_index, and how long one full page may take
+MAX_CONCURRENT_SCRAPES = 10
+SCRAPE_TIMEOUT = 20.0
+
+# Optional Chroma server, e.g. http://localhost:8000. When set, every index is a collection
+# on that server; otherwise each index is a local PersistentClient directory under persist_dir.
+CHROMA_SERVER_URL = os.getenv("CHROMA_SERVER_URL")
+
+# Optional output size for gemini-embedding-001 (e.g. 768 or 1536; full size is 3072). The model
+# is Matryoshka-trained, so shorter vectors keep most of the quality at a fraction of the disk
+# and memory. Changing it rebuilds existing indexes on next use.
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+
+
+def _pack_batches(items: List[int], sizes: List[int]) -> Iterator[List[int]]:
+    """Group items into batches of at most EMBED_BATCH_SIZE items and
+    EMBED_BATCH_MAX_BYTES bytes; sizes[i] is the encoded size of item i."""
+    batch, batch_bytes = [], 0
+    for i in items:
+        size = sizes[i]
+        if size > EMBED_BATCH_MAX_BYTES:
+            # Sent alone so it doesn't take a whole batch down with it
+            logger.warning(f"Node text of {size} bytes exceeds the embedding request limit; sending it on its own")
+            yield [i]
+            continue
+        if batch and (len(batch) == EMBED_BATCH_SIZE or batch_bytes + size > EMBED_BATCH_MAX_BYTES):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(i)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this pid is running."""
+    if not isinstance(pid, int):
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) would signal the process on Windows; rely on STALE_BUILD_SECONDS
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of a failed API call, if it carried one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by (embedding model, SHA-256 of the embedded text)."""
+    def __init__(self, path: Path):
+        self.path = path
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                    "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                    "PRIMARY KEY (model, hash))"
+                )
+        finally:
+            conn.close()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given hashes; misses are simply absent."""
+        if not hashes:
+            return {}
+        conn = sqlite3.connect(self.path)
+        try:
+            placeholders = ",".join("?" * len(hashes))
+            rows = conn.execute(
+                f"SELECT hash, vector FROM embedding_cache WHERE model = ? AND hash IN ({placeholders})",
+                [model, *hashes],
+            ).fetchall()
+        finally:
+            conn.close()
+        vectors = {}
+        for text_hash, blob in rows:
+            vector = array('d')
+            vector.frombytes(blob)
+            vectors[text_hash] = vector.tolist()
+        return vectors
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """Upsert freshly computed vectors."""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, hash, vector) VALUES (?, ?, ?)",
+                    [(model, text_hash, array('d', vector).tobytes()) for text_hash, vector in vectors.items()],
+                )
+        finally:
+            conn.close()
+
+
+class ScrapeCache:
+    """Persistent cache of extracted page text keyed by URL, with the validators
+    (ETag / Last-Modified) needed to revalidate it with a conditional GET."""
+    def __init__(self, path: Path):
+        self.path = path
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                    "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, text TEXT NOT NULL)"
+                )
+        finally:
+            conn.close()
+
+    def get(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """Return (etag, last_modified, text) for a cached page, or None."""
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(
+                "SELECT etag, last_modified, text FROM scrape_cache WHERE url = ?", (url,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], text: str) -> None:
+        """Upsert a page's extracted text along with its validators."""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO scrape_cache (url, etag, last_modified, text) VALUES (?, ?, ?, ?)",
+                    (url, etag, last_modified, text),
+                )
+        finally:
+            conn.close()
+
+
 class LlamaIndexManager:
     """Manages documentation indexing with version aware metadata."""
     def __init__(self, persist_dir: str='.data/indexes'):
         self.persist_dir= Path(persist_dir)
         self.persist_dir.mkdir(parents=True, exist_ok=True)
+        # Finish deleting indexes left behind by a rebuild that was interrupted
+        for trash in self.persist_dir.glob("*.trash.*"):
+            self._remove_in_background(trash)
         self.embed_model = GoogleGenAIEmbedding(
             model_name="gemini-embedding-001",
             api_key=os.getenv("GOOGLE_API_KEY"),
+            embedding_config={"output_dimensionality": EMBEDDING_DIMENSIONS} if EMBEDDING_DIMENSIONS else None,
+        )
+        # Identifies the vectors this model produces: cached embeddings and index sidecars
+        # from a different output size must not be mixed with these
+        self.embed_model_id = self.embed_model.model_name + (f":{EMBEDDING_DIMENSIONS}" if EMBEDDING_DIMENSIONS else "")
+        # Truncated vectors aren't unit length, so compare them by angle rather than L2 distance
+        self._collection_metadata = {"hnsw:space": "cosine"} if EMBEDDING_DIMENSIONS else None
+        self.embedding_cache = EmbeddingCache(self.persist_dir.parent / "embedding_cache.sqlite3")
+        self.scrape_cache = ScrapeCache(self.persist_dir.parent / "scrape_cache.sqlite3")
+        # Writer and critique re-ask the same questions across iterations
+        self._query_embedding = functools.lru_cache(maxsize=1024)(self.embed_model.get_query_embedding)
+        # LRU of formatted query_index results, keyed by (index_name, query hash, doc_type_filter)
+        self._query_cache: OrderedDict[Tuple[str, str, str], str] = OrderedDict()
+        self._query_cache_size = 512
+        self._query_cache_lock = threading.Lock()
+        # Retrievers per (index_name, doc_type_filter); guarded by the same lock
+        self._retrievers: Dict[Tuple[str, str], BaseRetriever] = {}
+        # Paces embedding requests to the quota, so concurrent batches don't burn through it and
+        # then all sit in the model's 429 backoff; a burst of one request per batch slot is allowed
+        self._embed_rate_limiter = TokenBucketRateLimiter(
+            requests_per_second=EMBED_REQUESTS_PER_MINUTE / 60,
+            max_bucket_size=MAX_CONCURRENT_EMBED_BATCHES,
         )
+        self._embed_waits = 0
+        # Output size of the embed model; fixed per model, so probed at most once
+        self._embed_dim: Optional[int] = None
+        # One chroma client per index directory, shared by existence checks, builds and queries.
+        # Opening a PersistentClient loads the index from disk, so it's done once per path.
+        self._clients: Dict[str, chromadb.ClientAPI] = {}
+        self._clients_lock = threading.Lock()
+        # Index builds running in this process, by index name. Sessions share this manager, so a
+        # second request for an index that is being built waits on that build instead of its own.
+        self._builds: Dict[str, asyncio.Task] = {}
+        self._build_waiters: Dict[asyncio.Task, int] = {}
+        # build_id each running build wrote into its in-progress sidecar
+        self._build_ids: Dict[str, str] = {}
 
     def get_index_name(self, library_name: str, version: str, language: str) -> str:
         """Generate consistent index name."""
         return f"{library_name}_{language}_{version}".replace('.', '_')
 
+    def _client_key(self, index_name: str) -> str:
+        return CHROMA_SERVER_URL or str(self.persist_dir / index_name)
+
+    def _get_client(self, index_name: str) -> chromadb.ClientAPI:
+        """Return the cached chroma client for an index, opening it on first use."""
+        key = self._client_key(index_name)
+        with self._clients_lock:
+            client = self._clients.get(key)
+            if client is None:
+                if CHROMA_SERVER_URL:
+                    server = urlparse(CHROMA_SERVER_URL)
+                    client = chromadb.HttpClient(
+                        host=server.hostname,
+                        port=server.port or (443 if server.scheme == "https" else 8000),
+                        ssl=server.scheme == "https",
+                    )
+                else:
+                    client = chromadb.PersistentClient(path=key)
+                self._clients[key] = client
+            return client
+
+    def _get_collection(self, index_name: str) -> chromadb.Collection:
+        """Open (or create, with this manager's distance metric) the collection backing an index."""
+        return self._get_client(index_name).get_or_create_collection(
+            name=index_name, metadata=self._collection_metadata
+        )
+
+    def _drop_index(self, index_name: str) -> None:
+        """Delete an index's stored vectors so it gets rebuilt."""
+        self._invalidate_query_cache(index_name)
+        if CHROMA_SERVER_URL:
+            self._get_client(index_name).delete_collection(name=index_name)
+            self._meta_path(index_name).unlink(missing_ok=True)
+            return
+        with self._clients_lock:
+            client = self._clients.pop(self._client_key(index_name), None)
+        if client is not None:
+            self._close_client(client)
+
+        index_path = self.persist_dir / index_name
+        trash = index_path.with_name(f"{index_name}.trash.{os.getpid()}.{time.time_ns()}")
+        try:
+            # A rename frees the index path at once; the files are deleted in the background
+            os.replace(index_path, trash)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Could not move {index_path} aside ({e}), deleting in place")
+            shutil.rmtree(index_path, ignore_errors=True)
+            return
+        self._remove_in_background(trash)
+
+    @staticmethod
+    def _close_client(client: chromadb.ClientAPI) -> None:
+        """Stop a PersistentClient's System and evict it from chromadb's per-path cache.
+
+        Otherwise the next PersistentClient for that path is handed the same System, with its
+        sqlite and segment handles still open on the directory that was moved aside.
+        clear_system_cache() would do this for every path, breaking the other open indexes.
+        These are chromadb internals, so a missing one is logged loudly rather than skipped.
+        """
+        systems = getattr(SharedSystemClient, "_identifier_to_system", None)
+        identifier = getattr(client, "_identifier", None)
+        if not isinstance(systems, dict) or identifier is None:
+            logger.warning(
+                "chromadb no longer exposes SharedSystemClient._identifier_to_system / _identifier; "
+                "a rebuilt index may reuse the dropped index's open files. Update _close_client."
+            )
+            return
+        try:
+            system = systems.pop(identifier, None)
+            if system is not None:
+                system.stop()
+        except Exception as e:
+            logger.warning(f"Could not stop chroma client for {identifier}: {e}")
+
+    @staticmethod
+    def _remove_in_background(path: Path) -> None:
+        threading.Thread(target=shutil.rmtree, args=(path, True), daemon=True).start()
+
+    def _get_embed_dim(self) -> int:
+        """Return the embedding dimension, embedding a probe text only on first use."""
+        if self._embed_dim is None:
+            # A configured output size is the dimension; otherwise probe through the same
+            # single-query call query_index uses, rather than the batch document path
+            self._embed_dim = EMBEDDING_DIMENSIONS or len(self._query_embedding("test"))
+        return self._embed_dim
+
     def index_exists(self, library_name: str, version: str, language: str) -> bool:
         """Check if a populated index already exists and matches current embedding dimension."""
         index_name = self.get_index_name(library_name, version, language)
-        index_path = self.persist_dir / index_name
         
         try:
-            chroma_client = chromadb.PersistentClient(path=str(index_path))
-            collection = chroma_client.get_or_create_collection(name=index_name)
+            collection = self._get_collection(index_name)
             
             if collection.count() == 0:
                 return False
                 
+            # The sidecar records which model built the index: a model switch means a rebuild,
+            # and a match means the vectors fit without reading one back from chroma
+            meta = self._read_index_meta(index_name)
+            if meta is not None:
+                # Sidecars from before the completion flag were only written once a build finished
+                if not meta.get("complete", True):
+                    if self._build_is_live(index_name, meta):
+                        logger.info(f"Index {index_name} is still being built (pid {meta.get('pid')})")
+                        return False
+                    logger.warning(f"Index {index_name} was not fully built. Rebuilding index...")
+                    self._drop_index(index_name)
+                    return False
+                if meta.get("embed_model") != self.embed_model_id:
+                    logger.warning(
+                        f"Embedding model changed (stored: {meta.get('embed_model')}, "
+                        f"current: {self.embed_model_id}). Rebuilding index..."
+                    )
+                    self._drop_index(index_name)
+                    return False
+                return True
+
             # Check dimension compatibility (auto-fix for model switching)
+            # Builds write an in-progress sidecar before their first node, so a populated
+            # collection without one was built before sidecars existed
             try:
                 stored_embedding = collection.peek(limit=1)['embeddings'][0]
-                current_dim = len(self.embed_model.get_text_embedding("test"))
+                current_dim = self._get_embed_dim()
                 
                 if len(stored_embedding) != current_dim:
                     logger.warning(f"Dimension mismatch (stored: {len(stored_embedding)}, current: {current_dim}). Rebuilding index...")
-                    del chroma_client # Attempt to close client
-                    shutil.rmtree(index_path, ignore_errors=True)
+                    self._drop_index(index_name)
                     return False
             except Exception as e:
                 # If checking dimensions fails, assume it's okay or let it rebuild if empty
@@ -63,25 +388,113 @@ class LlamaIndexManager:
         except Exception:
             return False
 
-    def create_index(self,
+    def _build_is_live(self, index_name: str, meta: Dict) -> bool:
+        """Whether the build that wrote an in-progress sidecar is still running."""
+        if meta.get("pid") == os.getpid():
+            # Builds in this process are tracked exactly
+            return meta.get("build_id") == self._build_ids.get(index_name)
+        if time.time() - meta.get("created_at", 0) > STALE_BUILD_SECONDS:
+            return False
+        return _pid_alive(meta.get("pid"))
+
+    def _meta_path(self, index_name: str) -> Path:
+        return self.persist_dir / index_name / "meta.json"
+
+    def _read_index_meta(self, index_name: str) -> Optional[Dict]:
+        """Return the index's build sidecar ({embed_model, dim, complete, pid, build_id, created_at}), or None if absent."""
+        try:
+            return json.loads(self._meta_path(index_name).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_index_meta(self, index_name: str, dim: int, build_id: str, complete: bool = True) -> None:
+        path = self._meta_path(index_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "embed_model": self.embed_model_id,
+            "dim": dim,
+            "complete": complete,
+            "pid": os.getpid(),
+            "build_id": build_id,
+            "created_at": time.time(),
+        }))
+
+    async def _await_embed_quota(self) -> None:
+        """Wait until the rate limiter allows another embedding request, logging any wait."""
+        wait = await self._embed_rate_limiter.await_token()
+        if wait > 0:
+            self._embed_waits += 1
+            logger.info(f"Embedding rate limit wait {self._embed_waits}: {wait:.1f}s")
+
+    async def _aembed_nodes(self, nodes: List[BaseNode]) -> List[BaseNode]:
+        """Attach embeddings to nodes, reusing cached vectors.
+
+        Hash the embed text -> look up cached vectors -> embed only the misses, in
+        concurrent batches -> upsert them -> assign every node its vector. Returns the
+        nodes that got a vector; a batch that still fails after a retry is skipped.
+        """
+        model_name = self.embed_model_id
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        encoded = [text.encode('utf-8') for text in texts]
+        hashes = [hashlib.sha256(data).hexdigest() for data in encoded]
+
+        vectors = await asyncio.to_thread(self.embedding_cache.get_many, model_name, hashes)
+        # One position per distinct uncached text, so duplicate chunks are embedded once
+        missing = list({text_hash: i for i, text_hash in enumerate(hashes) if text_hash not in vectors}.values())
+        batches = list(_pack_batches(missing, [len(data) for data in encoded]))
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_EMBED_BATCHES)
+
+        async def _embed_batch(batch: List[int]) -> Dict[str, List[float]]:
+            batch_texts = [texts[i] for i in batch]
+            async with semaphore:
+                await self._await_embed_quota()
+                # The embed model already retries 429/5xx with backoff; this covers the rest
+                try:
+                    new_vectors = await self.embed_model.aget_text_embedding_batch(batch_texts)
+                except Exception as e:
+                    delay = _retry_after(e) or EMBED_RETRY_DELAY
+                    logger.warning(f"Error embedding batch of {len(batch)} nodes: {e}. Pausing embedding for {delay:.1f}s...")
+                    # Paused on the shared bucket, so the other batches back off too
+                    self._embed_rate_limiter.pause(delay)
+                    await self._await_embed_quota()
+                    new_vectors = await self.embed_model.aget_text_embedding_batch(batch_texts)
+            return {hashes[i]: vector for i, vector in zip(batch, new_vectors)}
+
+        logger.info(f"Embedding {len(missing)} of {len(nodes)} nodes in {len(batches)} batches...")
+        results = await asyncio.gather(*[_embed_batch(batch) for batch in batches], return_exceptions=True)
+
+        fresh = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to embed batch of {len(batch)} nodes, skipping: {result}")
+                continue
+            fresh.update(result)
+        if fresh:
+            await asyncio.to_thread(self.embedding_cache.put_many, model_name, fresh)
+            vectors.update(fresh)
+
+        embedded = []
+        for node, text_hash in zip(nodes, hashes):
+            if text_hash in vectors:
+                node.embedding = vectors[text_hash]
+                embedded.append(node)
+        return embedded
+
+    def _build_documents(self,
                     library_name:str,
                     version:str,
                     language:str,
                     doc_content:List[Dict[str,str]],
-                    code_snippets:List[Dict[str,str]]) -> str:
-        """Create or get version specific index for library documentation and code snippets."""
-        index_name = self.get_index_name(library_name, version, language)
-        if self.index_exists(library_name, version, language):
-            return index_name
-
+                    code_snippets:List[Dict[str,str]]) -> Tuple[List[Document], List[Document]]:
+        """Wrap scraped docs and code snippets in Documents carrying version metadata."""
         # convert scraped docs to LlamaIndex Documents with metadata
         doc_documents = []
         code_documents = []
+        # Fields shared by every document in this build, merged into each metadata dict
+        base = {'library_name': library_name, 'version': version, 'language': language}
         for doc in doc_content:
             metadata = {
-                'library_name': library_name,
-                'version': version,
-                'language': language,
+                **base,
                 'source_url': doc.get('url',''),
                 'section': doc.get('section',''),
                 'doc_type':'documentation'
@@ -95,70 +508,168 @@ class LlamaIndexManager:
                 continue
                 
             metadata = {
-                'library_name': library_name,
-                'version': version,
-                'language': language,
+                **base,
                 'repo': snippet.get('repo',''),
                 'file_path': snippet.get('path',''),
                 'doc_type':'code_snippet'
             }
             code_documents.append(Document(text=code_text, metadata=metadata))
 
-        # create persistent chroma vector store
-        chroma_client = chromadb.PersistentClient(path=str(self.persist_dir / index_name))
-        chroma_collection = chroma_client.get_or_create_collection(name=index_name)
+        return doc_documents, code_documents
+
+    @staticmethod
+    def _parse_groups(documents: List[Document]) -> Iterator[List[Document]]:
+        """Yield consecutive groups of documents holding about STREAM_PARSE_CHARS of text."""
+        group, group_chars = [], 0
+        for document in documents:
+            if group and group_chars + len(document.text) > STREAM_PARSE_CHARS:
+                yield group
+                group, group_chars = [], 0
+            group.append(document)
+            group_chars += len(document.text)
+        if group:
+            yield group
+
+    def _add_nodes(self, index_name: str, nodes: List[BaseNode]) -> None:
+        """Write embedded nodes to the index's chroma collection in one bulk add."""
+        chroma_collection = self._get_collection(index_name)
         vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        vector_store.add(nodes)
+
+    async def acreate_index(self,
+                    library_name:str,
+                    version:str,
+                    language:str,
+                    doc_content:List[Dict[str,str]],
+                    code_snippets:List[Dict[str,str]]) -> str:
+        """Create or get version specific index for library documentation and code snippets.
+
+        Concurrent calls for the same index share one build; later callers wait for it.
+        """
+        index_name = self.get_index_name(library_name, version, language)
+        build = self._builds.get(index_name)
+        if build is None or build.done():
+            build = asyncio.create_task(self._build_index(
+                index_name, library_name, version, language, doc_content, code_snippets
+            ))
+            self._builds[index_name] = build
+            build.add_done_callback(functools.partial(self._forget_build, index_name))
+        return await self._await_build(build)
+
+    async def await_build(self, index_name: str) -> bool:
+        """Wait for this process's running build of an index, if any; False when there is none."""
+        build = self._builds.get(index_name)
+        if build is None:
+            return False
+        await self._await_build(build)
+        return True
 
-        doc_parser = SentenceSplitter(chunk_size=512, chunk_overlap=50)
+    async def _await_build(self, build: asyncio.Task) -> str:
+        # Shielded, so one waiter going away (a Streamlit rerun) doesn't abort the build for
+        # the others; it is cancelled only along with its last waiter
+        self._build_waiters[build] = self._build_waiters.get(build, 0) + 1
         try:
-            code_parser = CodeSplitter(
-                language=language,
-                chunk_lines = 40,
-                chunk_lines_overlap = 10,
-                max_chars = 1200
-            )
-        except Exception as e:
-            logger.warning(f"CodeSplitter failed for language '{language}': {e}. Using SentenceSplitter as fallback.")
-            code_parser = SentenceSplitter(chunk_size=512, chunk_overlap=50)
-
-        doc_nodes = doc_parser.get_nodes_from_documents(doc_documents)
-        code_nodes = code_parser.get_nodes_from_documents(code_documents)
-        nodes = doc_nodes + code_nodes
-        # Index with version metadata - processed in batches to respect API limits
-        # Create empty index first
-        index = VectorStoreIndex(
-            nodes=[],
-            storage_context=storage_context,
-            embed_model=self.embed_model
+            return await asyncio.shield(build)
+        except asyncio.CancelledError:
+            if self._build_waiters[build] == 1 and not build.done():
+                build.cancel()
+            raise
+        finally:
+            self._build_waiters[build] -= 1
+            if not self._build_waiters[build]:
+                del self._build_waiters[build]
+
+    def _forget_build(self, index_name: str, build: asyncio.Task) -> None:
+        if self._builds.get(index_name) is build:
+            del self._builds[index_name]
+
+    async def _build_index(self,
+                    index_name:str,
+                    library_name:str,
+                    version:str,
+                    language:str,
+                    doc_content:List[Dict[str,str]],
+                    code_snippets:List[Dict[str,str]]) -> str:
+        if await asyncio.to_thread(self.index_exists, library_name, version, language):
+            return index_name
+
+        doc_documents, code_documents = self._build_documents(
+            library_name, version, language, doc_content, code_snippets
         )
-        
-        # Insert nodes in small batches with delay to avoid 429 errors
-        batch_size = 5
-        logger.info(f"Indexing {len(nodes)} nodes in batches of {batch_size}...")
-        
-        for i in range(0, len(nodes), batch_size):
-            batch = nodes[i : i + batch_size]
+        # Parse -> embed -> write in a pipeline, so only a bounded slice of the corpus is held
+        # as nodes at once. The queue gives back-pressure: parsing pauses while embedding lags.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+        async def _parse() -> None:
             try:
-                index.insert_nodes(batch)
-                time.sleep(2.0) # Rate limit delay
-            except Exception as e:
-                logger.warning(f"Error indexing batch {i}: {e}. Retrying with delay...")
-                time.sleep(10.0)
-                try:
-                    index.insert_nodes(batch)
-                except Exception:
-                    logger.error(f"Failed to retry batch {i}, skipping.")
+                for documents, parse_language in ((doc_documents, None), (code_documents, language)):
+                    for group in self._parse_groups(documents):
+                        # Splitting is blocking (and may fan out to worker processes)
+                        await queue.put(await asyncio.to_thread(split_documents, group, parse_language))
+            except Exception:
+                # Still wake the consumer; the error surfaces when the parser task is awaited
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        parser = asyncio.create_task(_parse())
+        indexed, dim = 0, None
+        build_id = f"{os.getpid()}:{time.time_ns()}"
+        try:
+            pending: List[BaseNode] = []
+            while True:
+                nodes = await queue.get()
+                if nodes is not None:
+                    pending.extend(nodes)
+                if pending and (nodes is None or len(pending) >= STREAM_FLUSH_NODES):
+                    embedded = await self._aembed_nodes(pending)
+                    pending = []
+                    if embedded:
+                        if dim is None:
+                            # Nodes are written in slices, so mark the build in progress first:
+                            # if it dies part-way, index_exists rebuilds instead of reusing it
+                            dim = len(embedded[0].embedding)
+                            self._build_ids[index_name] = build_id
+                            await asyncio.to_thread(self._write_index_meta, index_name, dim, build_id, False)
+                        await asyncio.to_thread(self._add_nodes, index_name, embedded)
+                        indexed += len(embedded)
+                        logger.info(f"Indexed {indexed} nodes so far...")
+                if nodes is None:
+                    break
+            await parser
+            if dim is not None:
+                # Every node is stored: flip the in-progress sidecar to complete
+                await asyncio.to_thread(self._write_index_meta, index_name, dim, build_id)
+        except BaseException:
+            # Failed or cancelled: don't leave a partial collection behind
+            if dim is not None:
+                self._drop_index(index_name)
+            raise
+        finally:
+            parser.cancel()
+            if self._build_ids.get(index_name) == build_id:
+                del self._build_ids[index_name]
 
+        self._invalidate_query_cache(index_name)
         return index_name
+
+    def _invalidate_query_cache(self, index_name: str) -> None:
+        """Drop cached query results and retrievers for an index that was just (re)built."""
+        with self._query_cache_lock:
+            for key in [key for key in self._query_cache if key[0] == index_name]:
+                del self._query_cache[key]
+            for key in [key for key in self._retrievers if key[0] == index_name]:
+                del self._retrievers[key]
     
-    def query_index(self,
-                    index_name:str,
-                    query:str,
-                    doc_type_filter:str) ->str:
-        """Retrieve version specific documentation or code snippets from index."""
-        chroma_client = chromadb.PersistentClient(path=str(self.persist_dir / index_name))
-        chroma_collection = chroma_client.get_collection(name=index_name)
+    def _get_retriever(self, index_name: str, doc_type_filter: str) -> BaseRetriever:
+        """Return the retriever for an index and filter, building it on first use."""
+        key = (index_name, doc_type_filter or "")
+        with self._query_cache_lock:
+            retriever = self._retrievers.get(key)
+        if retriever is not None:
+            return retriever
+
+        chroma_collection = self._get_client(index_name).get_collection(name=index_name)
         vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
 
         index = VectorStoreIndex.from_vector_store(vector_store, embed_model=self.embed_model)
@@ -171,7 +682,24 @@ class LlamaIndexManager:
                 filters=[MetadataFilter(key="doc_type", value=doc_type_filter)]
             )
         retriever = index.as_retriever(similarity_top_k=5, filters=filters)
-        nodes = retriever.retrieve(query)
+        with self._query_cache_lock:
+            return self._retrievers.setdefault(key, retriever)
+
+    def query_index(self,
+                    index_name:str,
+                    query:str,
+                    doc_type_filter:str) ->str:
+        """Retrieve version specific documentation or code snippets from index."""
+        normalized = hashlib.sha256(query.lower().strip().encode('utf-8')).hexdigest()
+        cache_key = (index_name, normalized, doc_type_filter or "")
+        with self._query_cache_lock:
+            if cache_key in self._query_cache:
+                self._query_cache.move_to_end(cache_key)
+                return self._query_cache[cache_key]
+
+        retriever = self._get_retriever(index_name, doc_type_filter)
+        query_bundle = QueryBundle(query_str=query, embedding=self._query_embedding(query))
+        nodes = retriever.retrieve(query_bundle)
         
         # Format retrieved chunks as readable text
         results = []
@@ -180,7 +708,12 @@ class LlamaIndexManager:
             source = meta.get('doc_type', 'unknown')
             results.append(f"[{source}] (score: {node.score:.3f})\n{node.text}\n")
         
-        return "\n---\n".join(results) if results else "No relevant content found."
+        response = "\n---\n".join(results) if results else "No relevant content found."
+        with self._query_cache_lock:
+            self._query_cache[cache_key] = response
+            if len(self._query_cache) > self._query_cache_size:
+                self._query_cache.popitem(last=False)
+        return response
     
 manager = LlamaIndexManager()
 @tool
@@ -201,7 +734,7 @@ async def create_index(library_name:str,
     Returns:
         Name of the created index
     """
-    return await asyncio.to_thread(manager.create_index, library_name, version, language, doc_content, code_snippets)
+    return await manager.acreate_index(library_name, version, language, doc_content, code_snippets)
 
 @tool
 async def query_index(index_name:str,
@@ -239,48 +772,74 @@ async def build_and_index(
     Returns:
         Index name for later querying
     """
-    from llama_index.readers.web import TrafilaturaWebReader
+    import trafilatura
+
+    index_name = manager.get_index_name(library_name, version, language)
+    # Another session is already building this index: wait for it instead of scraping again
+    if await manager.await_build(index_name):
+        logger.info(f"Waited for the build of {index_name} started by another request - skipping scraping.")
+        return index_name
 
     # Check if index already exists to skip redundant scraping
     if await asyncio.to_thread(manager.index_exists, library_name, version, language):
-        index_name = manager.get_index_name(library_name, version, language)
         logger.info(f"Using existing index found for {index_name} - skipping scraping.")
         return index_name
 
-    reader = TrafilaturaWebReader()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
 
-    # Scrape all verified doc URLs in full (no truncation)
-    doc_content = []
-    for url in verified_doc_urls:
-        try:
-            documents = await asyncio.to_thread(reader.load_data, [url])
-            if documents:
-                doc_content.append({
-                    "url": url,
-                    "content": documents[0].text,
-                    "section": url.split("/")[-1] if "/" in url else "",
-                })
-                logger.info(f"Scraped full content from: {url} ({len(documents[0].text)} chars)")
-        except Exception as e:
-            logger.warning(f"Failed to scrape {url}: {e}")
+    async def _scrape(url: str) -> Optional[str]:
+        # A page scraped by an earlier build is revalidated with a conditional GET:
+        # a 304 reuses its extracted text without downloading or extracting it again
+        cached = await asyncio.to_thread(manager.scrape_cache.get, url)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        # Downloads share the pooled client (doc pages are usually on one host); only the
+        # CPU-bound extraction goes to a thread, outside the semaphore
+        async with semaphore:
+            response = await get_http_client().get(url, headers=headers, timeout=SCRAPE_TIMEOUT)
+        if cached and response.status_code == 304:
+            logger.info(f"Not modified since last scrape: {url}")
+            return cached[2]
+        response.raise_for_status()
+        # Raw bytes, so trafilatura detects the encoding (including <meta charset>) itself;
+        # response.text only knows the header charset and falls back to utf-8
+        text = await asyncio.to_thread(trafilatura.extract, response.content)
 
-    # Scrape changelog if provided
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        # Without a validator the copy could never be revalidated, so it isn't kept
+        if text and (etag or last_modified):
+            await asyncio.to_thread(manager.scrape_cache.put, url, etag, last_modified, text)
+        return text
+
+    # Scrape all verified doc URLs (and the changelog) in full, concurrently — no truncation
+    targets = [(url, url.split("/")[-1] if "/" in url else "") for url in verified_doc_urls]
     if changelog_url:
-        try:
-            documents = await asyncio.to_thread(reader.load_data, [changelog_url])
-            if documents:
-                doc_content.append({
-                    "url": changelog_url,
-                    "content": documents[0].text,
-                    "section": "changelog",
-                })
-                logger.info(f"Scraped changelog from: {changelog_url}")
-        except Exception as e:
-            logger.warning(f"Failed to scrape changelog {changelog_url}: {e}")
+        targets.append((changelog_url, "changelog"))
+    results = await asyncio.gather(*[_scrape(url) for url, _ in targets], return_exceptions=True)
+
+    doc_content = []
+    for (url, section), text in zip(targets, results):
+        label = "changelog " if section == "changelog" else ""
+        if isinstance(text, Exception):
+            logger.warning(f"Failed to scrape {label}{url}: {text}")
+            continue
+        if text is None:
+            continue
+        doc_content.append({"url": url, "content": text, "section": section})
+        if label:
+            logger.info(f"Scraped changelog from: {url}")
+        else:
+            logger.info(f"Scraped full content from: {url} ({len(text)} chars)")
 
     # Create the index with full content
-    index_name = await asyncio.to_thread(
-        manager.create_index,
+    index_name = await manager.acreate_index(
         library_name,
         version,
         language,
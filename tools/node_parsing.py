@@ -0,0 +1,102 @@
+"""
+Document -> node splitting for index builds.
+Kept apart from the embedding / vector-store stack so that worker processes only import
+llama_index's node parsers when a large build is split across cores.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceSplitter, CodeSplitter
+from llama_index.core.schema import BaseNode
+from config.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Below this much text, splitting in-process is faster than shipping documents to workers
+PARALLEL_PARSE_MIN_CHARS = 1_000_000
+MAX_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+# Splitters are built once and reused by every index build. Building a CodeSplitter loads a
+# tree-sitter grammar; a language without one falls back to the doc splitter, decided once.
+_DOC_PARSER = SentenceSplitter(chunk_size=512, chunk_overlap=50)
+_CODE_PARSERS: Dict[str, Tuple[object, threading.Lock]] = {}
+_CODE_PARSERS_LOCK = threading.Lock()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_code_parser(language: str) -> Tuple[object, threading.Lock]:
+    """Return the cached splitter for a language and the lock to hold while using it
+    (a tree-sitter parser must not be shared by two threads at once)."""
+    with _CODE_PARSERS_LOCK:
+        entry = _CODE_PARSERS.get(language)
+        if entry is None:
+            try:
+                parser = CodeSplitter(
+                    language=language,
+                    chunk_lines = 40,
+                    chunk_lines_overlap = 10,
+                    max_chars = 1200
+                )
+            except Exception as e:
+                logger.warning(f"CodeSplitter failed for language '{language}': {e}. Using SentenceSplitter as fallback.")
+                parser = _DOC_PARSER
+            entry = (parser, threading.Lock())
+            _CODE_PARSERS[language] = entry
+        return entry
+
+
+def parse_documents(documents: List[Document], language: Optional[str] = None) -> List[BaseNode]:
+    """Split documents with the code splitter for `language`, or the doc splitter when None."""
+    if language is None:
+        return _DOC_PARSER.get_nodes_from_documents(documents)
+    parser, lock = _get_code_parser(language)
+    with lock:
+        return parser.get_nodes_from_documents(documents)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the parent runs an event loop and client threads,
+            # which a forked child would inherit mid-operation
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def split_documents(documents: List[Document], language: Optional[str] = None) -> List[BaseNode]:
+    """Split documents into nodes, spreading large inputs over worker processes.
+
+    Documents are sharded by text size, keeping their order, so one long changelog
+    doesn't leave the other workers idle. Falls back to in-process splitting on failure.
+    """
+    total_chars = sum(len(document.text) for document in documents)
+    workers = min(MAX_PARSE_WORKERS, len(documents))
+    if total_chars < PARALLEL_PARSE_MIN_CHARS or workers < 2:
+        return parse_documents(documents, language)
+
+    shards: List[List[Document]] = [[]]
+    shard_chars = 0
+    target = total_chars / workers
+    for document in documents:
+        if shard_chars >= target and len(shards) < workers:
+            shards.append([])
+            shard_chars = 0
+        shards[-1].append(document)
+        shard_chars += len(document.text)
+
+    try:
+        results = _get_pool().map(parse_documents, shards, [language] * len(shards))
+        return [node for nodes in results for node in nodes]
+    except Exception as e:
+        logger.warning(f"Parallel parsing failed ({e}), splitting in-process")
+        return parse_documents(documents, language)
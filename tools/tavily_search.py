@@ -1,3 +1,4 @@
+import asyncio
 import os
 from langchain_core.tools import tool
 from langchain_tavily import TavilySearch
@@ -16,6 +17,13 @@ search = TavilySearch(api_key=tavily_api_key,
                       search_depth ="advanced"
                       )
 
+def _clean(result: dict) -> dict[str, str]:
+    return {
+        "title": result.get("title"),
+        "url": result.get("url"),
+        "content": result.get("content")
+    }
+
 @tool
 async def web_search(query: str) -> list[dict[str, str]]:
     """Tool to perform web search using TavilySearch.
@@ -26,13 +34,33 @@ async def web_search(query: str) -> list[dict[str, str]]:
     """
     try:
         results = await search.ainvoke(query)
-        cleaned_results = []
-        for result in results.get("results", []):
-            cleaned_results.append({
-                "title": result.get("title"),
-                "url": result.get("url"),
-                "content": result.get("content")
-            })
-        return cleaned_results
+        return [_clean(result) for result in results.get("results", [])]
     except Exception as e:
-        return [{"error": f"Web search failed: {str(e)}"}]
\ No newline at end of file
+        return [{"error": f"Web search failed: {str(e)}"}]
+
+@tool
+async def web_search_batch(queries: list[str]) -> list[dict[str, str]]:
+    """Tool to run several web searches at once using TavilySearch.
+    Use it instead of repeated web_search calls when you need more than one query.
+    Args:
+        queries (list[str]): The search query strings.
+    Returns:
+        list[dict[str, str]]: Search results from all queries, each containing 'title', 'url',
+        and 'content'. A URL found by several queries appears once, with its best-scored content.
+    """
+    # Queries are independent network calls, so they run concurrently
+    responses = await asyncio.gather(*[search.ainvoke(query) for query in queries], return_exceptions=True)
+
+    best: dict[str, dict] = {}
+    errors = []
+    for query, response in zip(queries, responses):
+        if isinstance(response, Exception):
+            logger.warning(f"Web search failed for '{query}': {response}")
+            errors.append({"error": f"Web search failed for '{query}': {str(response)}"})
+            continue
+        for result in response.get("results", []):
+            url = result.get("url")
+            if url not in best or result.get("score", 0) > best[url].get("score", 0):
+                best[url] = result
+
+    return [_clean(result) for result in best.values()] + errors
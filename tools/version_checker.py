@@ -1,40 +1,117 @@
 import os
 import httpx
 import asyncio
-from typing import Dict, Optional, Literal
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Literal
 from datetime import datetime
 from langchain_core.tools import tool
 from config.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# detect_language hits two registries at once; keep those connections alive between
+# lookups so repeat checks skip the TCP+TLS handshake. HTTP/2 would need the optional
+# h2 package, which isn't a dependency, so pooling stays on HTTP/1.1 keep-alive.
+_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0)
+_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+_HEADERS = {"User-Agent": "DevAgent/1.0"}
+
+# Lookups are repeated across agent steps within a session, so results are kept in memory.
+# A library's registry rarely changes; its latest version can, so that expires sooner.
+LANGUAGE_CACHE_TTL = 900
+VERSION_CACHE_TTL = 300
+CACHE_MAX_ENTRIES = 1024
+
 
 class VersionChecker:
     """Unified interface for checking library versions across different package managers."""
 
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=15)
+        self.client = httpx.AsyncClient(timeout=_TIMEOUT, limits=_LIMITS, headers=_HEADERS)
+        # key -> (expires_at, value); insertion-ordered so the oldest entry is evicted first
+        self._cache: Dict[tuple, tuple] = {}
+        self._cache_locks: Dict[tuple, asyncio.Lock] = {}
 
     async def close(self):
-        """Close the current httpx client session."""
+        """Close the current httpx client session and drop cached lookups."""
         if not self.client.is_closed:
             await self.client.aclose()
-    
+        self._cache.clear()
+        self._cache_locks.clear()
+
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, *args):
         await self.close()
 
+    async def _cached(self, key: tuple, ttl: float, fetch: Callable[[], Awaitable[Any]], keep: Callable[[Any], bool]) -> Any:
+        """
+        Return the cached value for key while fresh, otherwise await fetch() and cache it if keep(value).
+        Concurrent callers for the same key share one fetch.
+        """
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        lock = self._cache_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                entry = self._cache.get(key)
+                if entry and entry[0] > time.monotonic():
+                    return entry[1]
+
+                value = await fetch()
+                if keep(value):
+                    self._store(key, ttl, value)
+                return value
+        finally:
+            # A lock is only kept alongside a cached entry, so misses and errors don't pile up
+            if key not in self._cache and self._cache_locks.get(key) is lock:
+                del self._cache_locks[key]
+
+    def _store(self, key: tuple, ttl: float, value: Any) -> None:
+        self._cache.pop(key, None)
+        self._cache[key] = (time.monotonic() + ttl, value)
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            oldest = next(iter(self._cache))
+            del self._cache[oldest]
+            self._cache_locks.pop(oldest, None)
+
     async def detect_language(self,library_name: str) -> Optional[str]:
         """Auto detect if library is Python or JavaScript by querying both registries."""
-
+        # A miss (None) may just be a network failure, so only found languages are cached
+        return await self._cached(
+            ('language', library_name), LANGUAGE_CACHE_TTL,
+            lambda: self._detect_language(library_name),
+            keep=lambda language: language is not None,
+        )
+
+    async def _detect_language(self,library_name: str) -> Optional[str]:
         pypi_url = f"https://pypi.org/pypi/{library_name}/json"
         npm_url = f"https://registry.npmjs.org/{library_name}"
 
-        pypi_exists,npm_exists = await asyncio.gather(
-            self._check_exists(pypi_url),
-            self._check_exists(npm_url))
+        pypi_data,npm_data = await asyncio.gather(
+            self._fetch_metadata(pypi_url),
+            self._fetch_metadata(npm_url))
+        pypi_exists = pypi_data is not None
+        npm_exists = npm_data is not None
+
+        # Existence was checked by downloading the metadata, so keep the version info it
+        # holds; the get_latest_version call that usually follows is then served from cache
+        for language, data, parse in (
+            ('python', pypi_data, self._parse_pypi_data),
+            ('javascript', npm_data, self._parse_npm_data),
+        ):
+            if data is None:
+                continue
+            try:
+                result = parse(data)
+            except Exception as e:
+                logger.debug(f"Could not parse {language} registry data for {library_name}: {e}")
+                continue
+            if 'error' not in result:
+                self._store(('version', library_name, language), VERSION_CACHE_TTL, result)
 
         if pypi_exists and not npm_exists:
             return 'python'
@@ -46,7 +123,14 @@ class VersionChecker:
     
     async def get_latest_version(self,library_name: str, language: str) -> Dict:
         """Get the latest version and release date of a library from the appropriate registry."""
-
+        # Errors aren't cached, so a transient registry failure is retried on the next call
+        return await self._cached(
+            ('version', library_name, language), VERSION_CACHE_TTL,
+            lambda: self._get_latest_version(library_name, language),
+            keep=lambda result: 'error' not in result,
+        )
+
+    async def _get_latest_version(self,library_name: str, language: str) -> Dict:
         if language == 'python':
             return await self._get_pypi_version(library_name)
         elif language == 'javascript':
@@ -63,24 +147,7 @@ class VersionChecker:
             
             response = await self.client.get(url)
             response.raise_for_status()
-            data = response.json()
-            info = data.get('info', {})
-            version = info.get('version')
-            project_urls = info.get('project_urls', {})
-            releases = data.get('releases', {})
-            latest_release = releases.get(version, [])
-            release_date_raw = latest_release[0].get('upload_time') if latest_release else None
-            release_date = None
-            if release_date_raw:
-                try:
-                    release_date = datetime.fromisoformat(release_date_raw.replace('Z', '+00:00'))
-                except (ValueError, TypeError):
-                    release_date = release_date_raw
-            return {'version': version, 
-                    'release_date': release_date,
-                    'package_manager': 'pip',
-                    'docs_url':info.get('docs_url') or project_urls.get('Documentation') or project_urls.get('documentation'),
-                    'repository_url':project_urls.get('Repository') or project_urls.get('repository')}
+            return self._parse_pypi_data(response.json())
         except httpx.HTTPStatusError as e:
             logger.warning(f"HTTP error fetching PyPI version for {package}: {e}")
             return {'error': f"Status {e.response.status_code}: {str(e)}"}
@@ -97,32 +164,7 @@ class VersionChecker:
         try:
             response = await self.client.get(url)
             response.raise_for_status()
-            data = response.json()
-            latest_version = data.get("dist-tags", {}).get("latest")
-            if not latest_version:
-                return {"error": "No version found for this package"}
-            version_metadata = data.get("versions", {}).get(latest_version, {})
-            release_date_raw = data.get("time", {}).get(latest_version)
-            release_date = None
-            if release_date_raw:
-                try:
-                # Handle standard ISO and Z-format safely
-                    release_date = datetime.fromisoformat(release_date_raw.replace('Z', '+00:00'))
-                except (ValueError, TypeError):
-                    release_date = release_date_raw
-
-            repository = version_metadata.get('repository', {})
-            repo_url = repository.get('url') if isinstance(repository, dict) else repository
-
-            return {
-                'version': latest_version,
-                'release_date': release_date,
-                'package_manager': 'npm',
-                'homepage': version_metadata.get('homepage'),
-                'docs_url': None, 
-                'repository': repository,
-                'repository_url': repo_url
-            }
+            return self._parse_npm_data(response.json())
         except httpx.HTTPStatusError as e:
             logger.warning(f"HTTP error fetching npm version for {package}: {e}")
             return {'error': f"Status {e.response.status_code}: {str(e)}"}
@@ -131,13 +173,65 @@ class VersionChecker:
             return {'error': str(e)}
 
 
-    async def _check_exists(self,url:str) -> bool:
-        """Check if package exists on PyPI or npm by sending a HEAD request."""
+    @staticmethod
+    def _parse_pypi_data(data: Dict) -> Dict:
+        """Extract latest version info from a PyPI JSON API response."""
+        info = data.get('info', {})
+        version = info.get('version')
+        project_urls = info.get('project_urls', {})
+        releases = data.get('releases', {})
+        latest_release = releases.get(version, [])
+        release_date_raw = latest_release[0].get('upload_time') if latest_release else None
+        release_date = None
+        if release_date_raw:
+            try:
+                release_date = datetime.fromisoformat(release_date_raw.replace('Z', '+00:00'))
+            except (ValueError, TypeError):
+                release_date = release_date_raw
+        return {'version': version, 
+                'release_date': release_date,
+                'package_manager': 'pip',
+                'docs_url':info.get('docs_url') or project_urls.get('Documentation') or project_urls.get('documentation'),
+                'repository_url':project_urls.get('Repository') or project_urls.get('repository')}
+
+    @staticmethod
+    def _parse_npm_data(data: Dict) -> Dict:
+        """Extract latest version info from an npm registry response."""
+        latest_version = data.get("dist-tags", {}).get("latest")
+        if not latest_version:
+            return {"error": "No version found for this package"}
+        version_metadata = data.get("versions", {}).get(latest_version, {})
+        release_date_raw = data.get("time", {}).get(latest_version)
+        release_date = None
+        if release_date_raw:
+            try:
+            # Handle standard ISO and Z-format safely
+                release_date = datetime.fromisoformat(release_date_raw.replace('Z', '+00:00'))
+            except (ValueError, TypeError):
+                release_date = release_date_raw
+
+        repository = version_metadata.get('repository', {})
+        repo_url = repository.get('url') if isinstance(repository, dict) else repository
+
+        return {
+            'version': latest_version,
+            'release_date': release_date,
+            'package_manager': 'npm',
+            'homepage': version_metadata.get('homepage'),
+            'docs_url': None, 
+            'repository': repository,
+            'repository_url': repo_url
+        }
+
+    async def _fetch_metadata(self,url:str) -> Optional[Dict]:
+        """Return a package's registry metadata, or None if it doesn't exist there (or the request failed)."""
         try:
-                response = await self.client.head(url,follow_redirects=True)
-                return response.status_code == 200
+                response = await self.client.get(url,follow_redirects=True)
+                if response.status_code != 200:
+                    return None
+                return response.json()
         except Exception:
-            return False
+            return None
         
 checker = VersionChecker()
 